@@ -0,0 +1,47 @@
+"""
+Picking the values of the nine default headers out of a request: one
+`CIMultiDict.get` per header name (as `utils.get_request_header` does)
+against the single pass of `headers.HeaderPlan`, for requests with a few
+and with many headers.
+"""
+
+from common import bench
+from common import header
+from multidict import CIMultiDict
+
+from sanic_ipware import defaults as defs
+from sanic_ipware.headers import HeaderPlan
+
+ORDER = defs.IPWARE_META_PRECEDENCE_ORDER
+
+BROWSER = [
+    ("Host", "example.com"),
+    ("User-Agent", "Mozilla/5.0 (X11; Linux x86_64)"),
+    ("Accept", "text/html,application/xhtml+xml"),
+    ("Accept-Encoding", "gzip, deflate, br"),
+    ("Accept-Language", "en-US,en;q=0.5"),
+    ("Connection", "keep-alive"),
+    ("X-Forwarded-For", "177.139.233.139, 198.84.193.157"),
+]
+
+
+def per_header_get(headers):
+    return tuple([headers.get(name) for name in ORDER])
+
+
+def main():
+    plan = HeaderPlan(ORDER)
+    padding = [("X-Extra-{}".format(i), "value") for i in range(20)]
+    for title, items in (
+        ("{} headers".format(len(BROWSER)), BROWSER),
+        ("{} headers".format(len(BROWSER) + 20), BROWSER + padding),
+    ):
+        headers = CIMultiDict(items)
+        header(title)
+        bench("CIMultiDict.get per header", per_header_get, headers)
+        bench("HeaderPlan.values", plan.values, headers)
+        bench("HeaderPlan.values (dict)", plan.values, dict(items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Resolving requests that carry a single address header (like the X-Real-IP or
+True-Client-IP a CDN sets) with the `single` parser, which looks for no
+separator, against the generic `list` parser, with both the scanning proxy
+orders and the right-most-untrusted walk. A Via header is parsed with the
+`via` parser too, which takes the `received-by` part of every entry.
+"""
+
+from common import bench
+from common import header
+
+from sanic_ipware import ClientIPResolver
+from sanic_ipware.headers import parse_via
+from sanic_ipware.headers import scan_single
+from sanic_ipware.headers import walk_single
+from sanic_ipware.utils import scan_ips_from_string
+from sanic_ipware.utils import walk_ips_from_string
+
+ORDER = ["X-Real-IP", "True-Client-IP"]
+VALUE = "177.139.233.139"
+
+
+def main():
+    headers = {"True-Client-IP": VALUE}
+    header("scan, {!r}".format(VALUE))
+    bench("list", scan_ips_from_string, VALUE)
+    bench("single", scan_single, VALUE)
+
+    header("walk, {!r}".format(VALUE))
+    bench("list", walk_ips_from_string, VALUE)
+    bench("single", walk_single, VALUE)
+
+    for proxy_order in ("left-most", "right-most-untrusted"):
+        header("{}, True-Client-IP only".format(proxy_order))
+        for parser in ("list", "single"):
+            resolver = ClientIPResolver(
+                proxy_order=proxy_order,
+                request_header_order=ORDER,
+                header_parsers={name: parser for name in ORDER},
+                cache_size=1024,
+            )
+            bench(parser, resolver.resolve_headers, headers)
+
+    header("Via")
+    bench("parse_via", parse_via, "1.1 177.139.233.139, 1.1 proxy.example")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Startup cost: the time a fresh interpreter takes to `import sanic_ipware`
+(and then to classify its first address, which builds the lookup tables),
+over a bare interpreter start. Run it against two checkouts to compare.
+"""
+
+import subprocess
+import sys
+import time
+
+from common import header
+
+RUNS = 20
+
+STATEMENTS = (
+    ("python -c pass", "pass"),
+    ("import sanic_ipware", "import sanic_ipware"),
+    (
+        "import + first is_private_ip",
+        "import sanic_ipware; sanic_ipware.utils.is_private_ip('10.0.0.1')",
+    ),
+    (
+        "import + IPWARE_IPV4_REGEX",
+        "import sanic_ipware; sanic_ipware.defaults.IPWARE_IPV4_REGEX.match",
+    ),
+)
+
+
+def best_of(statement, runs=RUNS):
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.check_call([sys.executable, "-c", statement])
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    header("best of {} interpreter starts".format(RUNS))
+    baseline = None
+    for label, statement in STATEMENTS:
+        elapsed = best_of(statement)
+        if baseline is None:
+            baseline = elapsed
+        print(
+            "{:<56} {:>10.2f} ms {:>+10.2f} ms".format(
+                label, elapsed * 1e3, (elapsed - baseline) * 1e3
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Resolving 100,000 requests from 2,000 IPv6 clients, spelled in various ways
+(case, leading zeros, compression), with a small address cache: without
+interning, every cache miss hands out a fresh client IP string; with an
+`InternTable`, all of them share one canonical string per address. Then the
+results are counted in a dict, the way a rate limiter would key them.
+"""
+
+import random
+import sys
+from collections import Counter
+
+from common import bench
+from common import header
+
+from sanic_ipware import ClientIPResolver
+
+REQUESTS = 100000
+CLIENTS = 2000
+
+
+def spellings(value):
+    groups = [
+        "{:x}".format(value >> shift & 0xFFFF) for shift in range(112, -1, -16)
+    ]
+    full = ":".join(group.zfill(4) for group in groups)
+    return [
+        ":".join(groups),
+        full,
+        full.upper(),
+        "2001:db8::{:x}:{:x}".format(value >> 16 & 0xFFFF, value & 0xFFFF),
+    ]
+
+
+def main():
+    rng = random.Random(42)
+    clients = [
+        spellings(0x20010DB8 << 96 | rng.getrandbits(32))
+        for _ in range(CLIENTS)
+    ]
+    # a few clients make most of the requests
+    weights = [1 / (rank + 1) for rank in range(CLIENTS)]
+    requests = [
+        {"X-Real-IP": rng.choice(client)}
+        for client in rng.choices(clients, weights, k=REQUESTS)
+    ]
+
+    for intern_size in (None, 4096):
+        resolver = ClientIPResolver(cache_size=256, intern_size=intern_size)
+        label = "intern_size={}".format(intern_size)
+        header(label)
+        results = [ip for ip, _ in resolver.resolve_many(requests)]
+        distinct = {id(ip): ip for ip in results}
+        print(
+            "{:,} distinct addresses, {:,} string objects, {:,} bytes".format(
+                len(set(results)),
+                len(distinct),
+                sum(sys.getsizeof(ip) for ip in distinct.values()),
+            )
+        )
+        if resolver.intern_table is not None:
+            print(resolver.intern_table.stats())
+        bench(
+            "resolve_many",
+            lambda: [ip for ip, _ in resolver.resolve_many(requests)],
+            number=1,
+        )
+        bench("Counter of client IPs", Counter, results, number=1)
+
+
+if __name__ == "__main__":
+    main()
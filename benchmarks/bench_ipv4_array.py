@@ -0,0 +1,46 @@
+"""
+Classifying 1,000,000 IPv4 addresses: one `utils.is_private_ip` call per
+address against `utils.classify_ipv4_array` on an array of uint32 values and
+on an array of strings. Requires numpy.
+"""
+
+import random
+
+import numpy
+from common import bench
+from common import header
+
+from sanic_ipware import utils as util
+
+ROWS = 1000000
+
+
+def main():
+    rng = random.Random(42)
+    values = numpy.array(
+        [rng.getrandbits(32) for _ in range(ROWS)], dtype=numpy.uint32
+    )
+    strings = [
+        "{}.{}.{}.{}".format(v >> 24, v >> 16 & 255, v >> 8 & 255, v & 255)
+        for v in values.tolist()
+    ]
+
+    header("{:,} addresses".format(ROWS))
+    bench(
+        "is_private_ip, one by one",
+        lambda: [util.is_private_ip(ip) for ip in strings],
+        number=1,
+        repeat=3,
+    )
+    bench("classify_ipv4_array (uint32)", util.classify_ipv4_array, values)
+    bench(
+        "classify_ipv4_array (strings)",
+        util.classify_ipv4_array,
+        strings,
+        number=1,
+        repeat=3,
+    )
+
+
+if __name__ == "__main__":
+    main()
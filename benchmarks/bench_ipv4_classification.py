@@ -0,0 +1,41 @@
+"""
+Private/loopback classification of IPv4 addresses: the regular expression
+built from `IPWARE_PRIVATE_IPV4_PREFIX` with `Trie` against the bisect over
+the integer range tables used by `utils.is_private_ip`.
+"""
+
+from common import bench
+from common import header
+
+from sanic_ipware import defaults as defs
+from sanic_ipware import utils as util
+
+ADDRESSES = (
+    "177.139.233.139",  # public
+    "10.0.0.1",  # private, first range
+    "100.127.255.254",  # private, carrier-grade NAT
+    "198.51.100.7",  # private, documentation
+    "255.255.255.255",  # private, last range
+    "127.0.0.1",  # loopback
+)
+
+
+def regex_is_private(ip_str, regex=defs.IPWARE_IPV4_REGEX):
+    return regex.match(ip_str) is not None
+
+
+def main():
+    for ip in ADDRESSES:
+        assert regex_is_private(ip) == util.is_private_ip(ip), ip
+        header(ip)
+        bench("regex (IPWARE_IPV4_REGEX.match)", regex_is_private, ip)
+        bench("integer ranges (utils.is_private_ip)", util.is_private_ip, ip)
+        bench(
+            "integer ranges, pre-parsed",
+            defs.IPWARE_NON_PUBLIC_IPV4_RANGES.__contains__,
+            util.ipv4_to_int(ip),
+        )
+
+
+if __name__ == "__main__":
+    main()
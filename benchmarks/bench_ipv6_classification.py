@@ -0,0 +1,41 @@
+"""
+Private/loopback classification of IPv6 addresses: the `str.startswith` chain
+over `IPWARE_PRIVATE_IPV6_PREFIX` against the prefix table lookup on the
+packed value used by `utils.is_private_ip`.
+"""
+
+from common import bench
+from common import header
+
+from sanic_ipware import defaults as defs
+from sanic_ipware import utils as util
+
+ADDRESSES = (
+    "3ffe:1900:4545:3:200:f8ff:fe21:67cf",  # public
+    "2001:db8::1",  # private, documentation
+    "FC00::1",  # private, unique local (missed by the prefix chain)
+    "fe80::1",  # private, link-local
+    "::1",  # loopback
+)
+
+PREFIXES = defs.IPWARE_PRIVATE_IPV6_PREFIX + defs.IPWARE_LOOPBACK_PREFIX
+
+
+def startswith_is_private(ip_str, prefixes=PREFIXES):
+    return ip_str.startswith(prefixes)
+
+
+def main():
+    for ip in ADDRESSES:
+        header(ip)
+        bench("str.startswith chain", startswith_is_private, ip)
+        bench("prefix table (utils.is_private_ip)", util.is_private_ip, ip)
+        bench(
+            "prefix table, pre-parsed",
+            defs.IPWARE_NON_PUBLIC_IPV6_TABLE.__contains__,
+            util.ipv6_to_int(ip),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+The cost of instrumentation: resolving the same requests without metrics
+(a single `is not None` check on the way) and with a `ResolverMetrics`
+recording the winning header, fall-throughs, invalid tokens and timings,
+with and without a result cache.
+"""
+
+from common import bench
+from common import header
+
+from sanic_ipware import ClientIPResolver
+from sanic_ipware.metrics import ResolverMetrics
+
+REQUESTS = [
+    {"X-Forwarded-For": "177.139.233.139, 198.84.193.157"},
+    {"X-Forwarded-For": "10.0.0.1", "X-Real-IP": "177.139.233.133"},
+    {"X-Forwarded-For": "unknown, 10.0.0.1", "X-Real-IP": "10.0.0.2"},
+    {"Forwarded": "for=198.84.193.157"},
+    {"User-Agent": "curl/7.61.0"},
+]
+
+
+def main():
+    for options in ({"cache_size": 256}, {"result_cache_size": 256}):
+        for metrics in (None, ResolverMetrics()):
+            resolver = ClientIPResolver(metrics=metrics, **options)
+            header(
+                "{}, metrics={}".format(
+                    ", ".join(
+                        "{}={}".format(*item) for item in options.items()
+                    ),
+                    metrics is not None,
+                )
+            )
+            bench(
+                "resolve_headers x {}".format(len(REQUESTS)),
+                lambda: [resolver.resolve_headers(h) for h in REQUESTS],
+            )
+        print(resolver.snapshot())
+
+
+if __name__ == "__main__":
+    main()
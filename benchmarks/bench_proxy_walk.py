@@ -0,0 +1,74 @@
+"""
+Resolving X-Forwarded-For chains of growing length (one client and then
+trusted proxies) with each proxy order: the `left-most` and `right-most`
+scans, which only look at the ends of the chain, against the
+`right-most-untrusted` walk, which has to check every trusted hop. The walk
+itself (a backwards scan of the string) is also compared with splitting the
+header into a list and reversing it, which costs the same for a chain of
+trusted hops but grows with every spoofed entry a client puts in front.
+"""
+
+from common import bench
+from common import header
+
+from sanic_ipware import ClientIPResolver
+from sanic_ipware import utils as util
+from sanic_ipware.address import parse_ip
+from sanic_ipware.cache import LRUCache
+from sanic_ipware.ranges import NetworkIndex
+
+TRUSTED = ["10.0.0.0/8"]
+CLIENT = "177.139.233.139"
+
+
+def split_and_reverse(value, trusted, parse):
+    ips = [ip.strip().lower() for ip in value.split(",")]
+    ips.reverse()
+    ip = None
+    for token in ips:
+        if not token:
+            continue
+        ip = parse(token)
+        if ip is None or not trusted.contains(ip.version, ip.value):
+            return ip
+    return ip
+
+
+def main():
+    options = {"cache_size": 1024}
+    left = ClientIPResolver(proxy_trusted_ips=TRUSTED, **options)
+    right = ClientIPResolver(proxy_order="right-most", **options)
+    walk = ClientIPResolver(
+        proxy_order="right-most-untrusted",
+        proxy_trusted_ips=TRUSTED,
+        **options
+    )
+    trusted = NetworkIndex(TRUSTED)
+    parse = LRUCache(parse_ip, 1024).lookup
+    spoofed = ["198.51.100.{}".format(i) for i in range(20)]
+    for title, chain in (
+        ("1 trusted hop", [CLIENT, "10.0.0.1"]),
+        ("3 trusted hops", [CLIENT, "10.0.0.1", "10.0.0.2", "10.0.0.3"]),
+        ("8 trusted hops", [CLIENT] + ["10.0.0.1"] * 8),
+        ("20 spoofed entries, 1 trusted hop", spoofed + [CLIENT, "10.0.0.1"]),
+    ):
+        value = ", ".join(chain)
+        headers = {"X-Forwarded-For": value}
+        header(title)
+        bench("left-most, trusted proxies", left.resolve_headers, headers)
+        bench("right-most", right.resolve_headers, headers)
+        bench("right-most-untrusted", walk.resolve_headers, headers)
+        bench(
+            "walk_ips_from_string",
+            util.walk_ips_from_string,
+            value,
+            trusted,
+            parse,
+        )
+        bench(
+            "split + reverse + loop", split_and_reverse, value, trusted, parse
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Tokenizing X-Forwarded-For headers with 1, 10, 100 and 1,000 hops: the full
+split of `utils.get_ips_from_string` against the first/last/count scan of
+`utils.scan_ips_from_string`, with and without a `max_count` limit.
+"""
+
+from common import bench
+from common import header
+
+from sanic_ipware import utils as util
+
+HOPS = (1, 10, 100, 1000)
+
+
+def make_header(hops):
+    return ", ".join(
+        "198.{}.{}.{}".format(i // 65536 % 256, i // 256 % 256, i % 256)
+        for i in range(hops)
+    )
+
+
+def main():
+    for hops in HOPS:
+        value = make_header(hops)
+        header("{} hop(s), {} characters".format(hops, len(value)))
+        bench(
+            "split (utils.get_ips_from_string)",
+            util.get_ips_from_string,
+            value,
+        )
+        bench(
+            "scan (utils.scan_ips_from_string)",
+            util.scan_ips_from_string,
+            value,
+        )
+        bench(
+            "scan, max_count=20",
+            util.scan_ips_from_string,
+            value,
+            None,
+            20,
+        )
+
+
+if __name__ == "__main__":
+    main()
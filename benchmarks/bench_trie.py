@@ -0,0 +1,72 @@
+"""
+Building a `Trie` of 100, 1,000 and 10,000 IPv4 prefixes (like the internal
+ranges users add to the defaults): adding the words, generating the pattern
+(on a fresh trie and then from the cache) and compiling it. The memory taken
+by the trie itself is reported as well.
+"""
+
+import random
+import re
+import tracemalloc
+
+from common import bench
+from common import header
+
+from sanic_ipware.trie import Trie
+
+SIZES = (100, 1000, 10000)
+
+
+def make_words(count, seed=42):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        octets = rng.randrange(1, 4)
+        words.add(
+            ".".join(str(rng.randrange(256)) for _ in range(octets)) + "."
+        )
+    return sorted(words)
+
+
+def build(words):
+    trie = Trie()
+    for word in words:
+        trie.add(word)
+    return trie
+
+
+def fresh_pattern(words):
+    return build(words).pattern()
+
+
+def compile_pattern(pattern):
+    re.purge()  # or else it is a cache hit, after the first run
+    return re.compile(pattern)
+
+
+def main():
+    for size in SIZES:
+        words = make_words(size)
+        header("{:,} words".format(size))
+        number = max(1, 10000 // size)
+        bench("add", build, words, number=number)
+        bench("add + pattern", fresh_pattern, words, number=number)
+        trie = build(words)
+        trie.pattern()
+        bench("pattern (cached)", trie.pattern)
+        bench(
+            "re.compile",
+            compile_pattern,
+            "^{}.*".format(trie.pattern()),
+            number=1,
+        )
+
+        tracemalloc.start()
+        trie = build(words)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{:<56} {:>12,} bytes".format("memory", size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Tiny helpers shared by the benchmark scripts in this directory. Run any of
+them from the root of the repository, e.g.:
+
+    PYTHONPATH=src python benchmarks/bench_ipv4_classification.py
+"""
+
+import timeit
+
+
+def bench(label, func, *args, number=None, repeat=5):
+    """
+    Times `func(*args)` and prints the best of `repeat` runs as operations
+    per second and microseconds per operation. Returns seconds per operation.
+    """
+    timer = timeit.Timer(lambda: func(*args))
+    if number is None:
+        number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    print(
+        "{:<56} {:>12,.0f} ops/sec {:>10.3f} usec/op".format(
+            label, 1 / best, best * 1e6
+        )
+    )
+    return best
+
+
+def header(title):
+    print()
+    print(title)
+    print("-" * len(title))
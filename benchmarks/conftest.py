@@ -0,0 +1,31 @@
+import tracemalloc
+
+import pytest
+from corpora import build_corpora
+
+
+@pytest.fixture(scope="session")
+def corpora():
+    return build_corpora()
+
+
+@pytest.fixture
+def allocations(benchmark):
+    """
+    Returns a function that runs `func(*args)` once under tracemalloc and
+    records, along with the timings, the peak memory allocated during that
+    call and the memory still allocated after it (in bytes)
+    """
+
+    def measure(func, *args):
+        func(*args)  # warm up caches and lazily built tables first
+        tracemalloc.start()
+        try:
+            func(*args)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_bytes"] = peak
+        benchmark.extra_info["retained_bytes"] = current
+
+    return measure
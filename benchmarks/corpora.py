@@ -0,0 +1,319 @@
+"""
+A generator of synthetic, seeded traffic: request headers as a deployment
+behind proxies sees them. Client popularity is Zipfian (a few addresses
+make most of the requests, as in real access logs, so caches behave the
+way they would in production) and the number of proxies, the forwarding
+headers used, IPv6, ports and garbage entries all follow the distributions
+of a `TrafficProfile`. The same profile, size and seed always give the same
+corpus.
+
+Corpora are streamed to disk as JSON lines (gzipped for `.gz` paths), one
+header object per line, which `python -m sanic_ipware` reads as they are
+(once uncompressed):
+
+    python benchmarks/corpora.py --profile realistic -n 1000000 \\
+        -o /tmp/realistic.jsonl.gz
+"""
+
+import argparse
+import gzip
+import io
+import json
+import random
+import sys
+from bisect import bisect
+from collections import OrderedDict
+from itertools import accumulate
+
+SIZE = 1000
+SEED = 42
+
+# headers a browser sends, which any lookup has to get past
+BROWSER = OrderedDict(
+    (
+        ("Host", "example.com"),
+        (
+            "User-Agent",
+            "Mozilla/5.0 (X11; Linux x86_64; rv:62.0) Firefox/62.0",
+        ),
+        ("Accept", "text/html,application/xhtml+xml"),
+        ("Accept-Encoding", "gzip, deflate, br"),
+        ("Accept-Language", "en-US,en;q=0.5"),
+        ("Connection", "keep-alive"),
+    )
+)
+
+# what broken or hostile clients and proxies put in forwarding headers
+GARBAGE = ("unknown", "-", "_hidden", "999.10.0.1", "::ffff:zz", "localhost")
+
+
+class TrafficProfile:
+    """The distributions a corpus is drawn from. Histograms are mappings of
+    value -> weight (they need not add up to one):
+
+    * ``hops``: proxies between the client and us, per request
+    * ``headers``: the forwarding header used (``None`` for none at all):
+      ``X-Forwarded-For`` and ``Forwarded`` carry the whole chain, single
+      address headers (``X-Real-IP``, ``True-Client-IP``) just the client
+    * ``spoofed``: entries a client puts in front of its own address
+
+    ``clients`` is the size of the client pool and ``zipf`` the exponent of
+    its popularity; ``ipv6``, ``private``, ``ports`` and ``garbage`` are the
+    shares of IPv6 clients, private clients, chains with ports and chains
+    with a garbage entry in them."""
+
+    __slots__ = (
+        "hops",
+        "headers",
+        "spoofed",
+        "clients",
+        "zipf",
+        "ipv6",
+        "private",
+        "ports",
+        "garbage",
+    )
+
+    def __init__(
+        self,
+        hops=None,
+        headers=None,
+        spoofed=None,
+        clients=10000,
+        zipf=1.1,
+        ipv6=0.0,
+        private=0.0,
+        ports=0.0,
+        garbage=0.0,
+    ):
+        self.hops = hops or {1: 1}
+        self.headers = headers or {"X-Forwarded-For": 1}
+        self.spoofed = spoofed or {0: 1}
+        self.clients = clients
+        self.zipf = zipf
+        self.ipv6 = ipv6
+        self.private = private
+        self.ports = ports
+        self.garbage = garbage
+
+    def __repr__(self):
+        return "{}({})".format(
+            self.__class__.__name__,
+            ", ".join(
+                "{}={!r}".format(name, getattr(self, name))
+                for name in self.__slots__
+            ),
+        )
+
+
+PROFILES = OrderedDict(
+    (
+        ("no-proxy", TrafficProfile(headers={None: 1})),
+        ("cdn", TrafficProfile(hops={1: 1})),
+        ("5-hops", TrafficProfile(hops={4: 1})),
+        ("malicious", TrafficProfile(spoofed={200: 1})),
+        ("ipv6", TrafficProfile(ipv6=1.0)),
+        (
+            "mixed",
+            TrafficProfile(
+                hops={0: 4, 1: 4, 2: 2},
+                headers={"X-Forwarded-For": 6, "X-Real-IP": 3, "Forwarded": 1},
+                private=0.3,
+            ),
+        ),
+        (
+            "realistic",
+            TrafficProfile(
+                hops={0: 10, 1: 60, 2: 20, 3: 7, 5: 3},
+                headers={
+                    "X-Forwarded-For": 70,
+                    "Forwarded": 5,
+                    "X-Real-IP": 10,
+                    "True-Client-IP": 10,
+                    None: 5,
+                },
+                spoofed={0: 995, 1: 4, 50: 1},
+                ipv6=0.2,
+                private=0.05,
+                ports=0.05,
+                garbage=0.01,
+            ),
+        ),
+    )
+)
+
+
+class _Histogram:
+    """Draws values with the given weights, with a bisection per draw."""
+
+    __slots__ = ("values", "cumulative", "total")
+
+    def __init__(self, weights):
+        self.values = sorted(weights, key=repr)
+        self.cumulative = list(accumulate(weights[v] for v in self.values))
+        self.total = self.cumulative[-1]
+
+    def draw(self, rng):
+        index = bisect(self.cumulative, rng.random() * self.total)
+        return self.values[min(index, len(self.values) - 1)]
+
+
+# anywhere in 1.0.0.0 - 223.255.255.255 but 10/8, 127/8, 172/8 and 192/8
+_PUBLIC_FIRST_OCTETS = [
+    n for n in range(1, 224) if n not in (10, 127, 172, 192)
+]
+
+
+def _ipv4(rng, private=False):
+    if private:
+        return "10.{}.{}.{}".format(
+            rng.randrange(256), rng.randrange(256), rng.randrange(1, 255)
+        )
+    first = rng.choice(_PUBLIC_FIRST_OCTETS)
+    return "{}.{}.{}.{}".format(
+        first, rng.randrange(256), rng.randrange(256), rng.randrange(1, 255)
+    )
+
+
+def _ipv6(rng, private=False):
+    prefix = "fd12:3456:789a" if private else "2a03:2880:f12f"
+    return "{}:{:x}:{:x}::{:x}".format(
+        prefix, rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(16)
+    )
+
+
+def _with_port(rng, address):
+    port = rng.randrange(1024, 65536)
+    if ":" in address:
+        return "[{}]:{}".format(address, port)
+    return "{}:{}".format(address, port)
+
+
+def _forwarded_node(address):
+    if ":" in address:
+        return 'for="{}"'.format(address)
+    return "for={}".format(address)
+
+
+def generate(profile, size=SIZE, seed=SEED):
+    """
+    Lazily yields `size` header dicts drawn from profile, always the same
+    ones for the same seed
+    """
+    rng = random.Random(seed)
+    clients = []
+    for _ in range(profile.clients):
+        make = _ipv6 if rng.random() < profile.ipv6 else _ipv4
+        clients.append(make(rng, rng.random() < profile.private))
+    # proxies: a few CDN edges of each version, then internal load balancers
+    edges = [_ipv4(rng) for _ in range(20)] + [_ipv6(rng) for _ in range(20)]
+    internal = [_ipv4(rng, private=True) for _ in range(20)]
+
+    popularity = _Histogram(
+        {rank: 1 / (rank + 1) ** profile.zipf for rank in range(len(clients))}
+    )
+    hops = _Histogram(profile.hops)
+    headers = _Histogram(profile.headers)
+    spoofed = _Histogram(profile.spoofed)
+
+    for _ in range(size):
+        request = BROWSER.copy()
+        header = headers.draw(rng)
+        client = clients[popularity.draw(rng)]
+        if header is None:
+            yield request
+            continue
+
+        chain = [_ipv4(rng) for _ in range(spoofed.draw(rng))]
+        chain.append(client)
+        count = hops.draw(rng)
+        if count:
+            edge = edges[rng.randrange(20) + (20 if ":" in client else 0)]
+            chain.append(edge)
+            chain.extend(rng.choice(internal) for _ in range(count - 1))
+        if profile.ports and rng.random() < profile.ports:
+            chain = [_with_port(rng, address) for address in chain]
+        if profile.garbage and rng.random() < profile.garbage:
+            chain[rng.randrange(len(chain))] = rng.choice(GARBAGE)
+
+        if header == "X-Forwarded-For":
+            request[header] = ", ".join(chain)
+        elif header == "Forwarded":
+            request[header] = ", ".join(map(_forwarded_node, chain))
+        else:
+            request[header] = client
+        yield request
+
+
+def build_corpora(size=SIZE, seed=SEED):
+    """
+    Returns an OrderedDict of profile name -> list of `size` header dicts,
+    for every profile in `PROFILES`
+    """
+    return OrderedDict(
+        (name, list(generate(profile, size, seed)))
+        for name, profile in PROFILES.items()
+    )
+
+
+def _open(path, mode):
+    if path == "-":
+        return sys.stdin if mode == "r" else sys.stdout
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, mode + "b"), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_corpus(path, requests):
+    """
+    Streams header dicts to path (`-` for the standard output) as compact
+    JSON lines, returning how many were written
+    """
+    count = 0
+    output = _open(path, "w")
+    try:
+        for request in requests:
+            output.write(json.dumps(request, separators=(",", ":")))
+            output.write("\n")
+            count += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return count
+
+
+def read_corpus(path):
+    """
+    Lazily yields the header dicts of a corpus written by `write_corpus`
+    """
+    lines = _open(path, "r")
+    try:
+        for line in lines:
+            yield json.loads(line)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Writes a synthetic corpus of request headers"
+    )
+    parser.add_argument("--profile", choices=PROFILES, default="realistic")
+    parser.add_argument("-n", "--size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="file to write to, gzipped if it ends in .gz (default: stdout)",
+    )
+    args = parser.parse_args(argv)
+    profile = PROFILES[args.profile]
+    count = write_corpus(args.output, generate(profile, args.size, args.seed))
+    print("{:,} requests written".format(count), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+The benchmark suite, run with pytest-benchmark (see the `bench` tox
+environment). The whole resolution path is measured over a corpus of each
+profile of `corpora.py`, one round being a pass over all of its requests,
+and each utility on its own. Every benchmark records the memory allocated
+by one round as well.
+
+    tox -e bench
+    tox -e bench -- --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+
+from functools import partial
+
+import pytest
+from corpora import PROFILES
+from corpora import SIZE
+from multidict import CIMultiDict
+
+from sanic_ipware import ClientIPResolver
+from sanic_ipware import defaults as defs
+from sanic_ipware import get_client_ip
+from sanic_ipware import utils as util
+from sanic_ipware.trie import Trie
+
+CORPORA = list(PROFILES)
+
+VALUES = {
+    "single": "177.139.233.139",
+    "5-hops": "177.139.233.139, 198.84.193.157, 10.0.0.1, 10.0.0.2, 10.0.0.3",
+    "ipv6": "2a03:2880:f12f:83:face:b00c::25de, 2001:4860:4860::8888",
+}
+
+ADDRESSES = {
+    "ipv4-public": "177.139.233.139",
+    "ipv4-private": "192.168.1.1",
+    "ipv6-public": "2a03:2880:f12f:83:face:b00c::25de",
+    "ipv6-private": "fd12:3456:789a:1::1",
+}
+
+
+class Request:
+    __slots__ = ("headers",)
+
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def _resolve_all(resolve, items):
+    for item in items:
+        resolve(item)
+
+
+@pytest.mark.parametrize("corpus", CORPORA)
+def test_get_client_ip(benchmark, allocations, corpora, corpus):
+    requests = [Request(CIMultiDict(h)) for h in corpora[corpus]]
+    benchmark.extra_info["requests"] = SIZE
+    allocations(_resolve_all, get_client_ip, requests)
+    benchmark(_resolve_all, get_client_ip, requests)
+
+
+@pytest.mark.parametrize("networks", [5, 5000])
+def test_get_client_ip_trusted_networks(benchmark, allocations, networks):
+    # the same list object on every call, as with a constant or a partial
+    trusted = [
+        "{}.{}.{}.0/24".format(11 + i // 65536, i // 256 % 256, i % 256)
+        for i in range(networks)
+    ]
+    request = Request(
+        CIMultiDict({"X-Forwarded-For": "177.139.233.139, 11.0.0.1"})
+    )
+    resolve = partial(get_client_ip, proxy_trusted_ips=trusted)
+    allocations(resolve, request)
+    benchmark(resolve, request)
+
+
+@pytest.mark.parametrize("corpus", CORPORA)
+def test_resolver(benchmark, allocations, corpora, corpus):
+    resolver = ClientIPResolver(cache_size=4096)
+    headers = [CIMultiDict(h) for h in corpora[corpus]]
+    benchmark.extra_info["requests"] = SIZE
+    allocations(_resolve_all, resolver.resolve_headers, headers)
+    benchmark(_resolve_all, resolver.resolve_headers, headers)
+
+
+@pytest.mark.parametrize("corpus", CORPORA)
+def test_resolver_right_most_untrusted(
+    benchmark, allocations, corpora, corpus
+):
+    resolver = ClientIPResolver(
+        proxy_order="right-most-untrusted",
+        proxy_trusted_ips=["10.0.0.0/8"],
+        cache_size=4096,
+    )
+    headers = [CIMultiDict(h) for h in corpora[corpus]]
+    benchmark.extra_info["requests"] = SIZE
+    allocations(_resolve_all, resolver.resolve_headers, headers)
+    benchmark(_resolve_all, resolver.resolve_headers, headers)
+
+
+@pytest.mark.parametrize("value", list(VALUES))
+def test_get_ips_from_string(benchmark, allocations, value):
+    allocations(util.get_ips_from_string, VALUES[value])
+    benchmark(util.get_ips_from_string, VALUES[value])
+
+
+@pytest.mark.parametrize("value", list(VALUES))
+def test_scan_ips_from_string(benchmark, allocations, value):
+    allocations(util.scan_ips_from_string, VALUES[value])
+    benchmark(util.scan_ips_from_string, VALUES[value])
+
+
+@pytest.mark.parametrize("address", list(ADDRESSES))
+def test_is_private_ip(benchmark, allocations, address):
+    allocations(util.is_private_ip, ADDRESSES[address])
+    benchmark(util.is_private_ip, ADDRESSES[address])
+
+
+@pytest.mark.parametrize("address", ["ipv4-public", "ipv4-private"])
+def test_ipv4_regex(benchmark, allocations, address):
+    regex = defs.IPWARE_IPV4_REGEX
+    allocations(regex.match, ADDRESSES[address])
+    benchmark(regex.match, ADDRESSES[address])
+
+
+def test_trie_pattern(benchmark, allocations):
+    words = defs.IPWARE_PRIVATE_IPV4_PREFIX + defs.IPWARE_LOOPBACK_IPV4_PREFIX
+
+    def build():
+        tree = Trie()
+        for word in words:
+            tree.add(word)
+        return tree.pattern()
+
+    allocations(build)
+    benchmark(build)
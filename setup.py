@@ -55,8 +55,8 @@ setup(
     keywords=["sanic", "request", "ip"],
     install_requires=[],
     extras_require={
-        # eg:
-        #   'rst': ['docutils>=0.11'],
-        #   ':python_version=="2.6"': ['argparse'],
+        # vectorized classification of address arrays, see
+        # `utils.classify_ipv4_array`
+        "numpy": ["numpy"]
     },
 )
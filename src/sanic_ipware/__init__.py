@@ -3,8 +3,19 @@ __version__ = "0.1.0"
 import logging
 
 from . import utils
+from .extension import IPware
 from .ipware import get_client_ip
+from .ipware import get_client_ips
+from .registry import AddressSpaceRegistry
+from .resolver import ClientIPResolver
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 
-__all__ = ("get_client_ip", "utils")
+__all__ = (
+    "AddressSpaceRegistry",
+    "ClientIPResolver",
+    "IPware",
+    "get_client_ip",
+    "get_client_ips",
+    "utils",
+)
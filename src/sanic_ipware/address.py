@@ -0,0 +1,147 @@
+import socket
+import struct
+import typing as t
+
+from . import defaults as defs
+
+_AF_INET = socket.AF_INET
+_AF_INET6 = socket.AF_INET6
+_inet_pton = socket.inet_pton
+_inet_ntop = socket.inet_ntop
+_unpack_ipv4 = struct.Struct("!I").unpack
+_int_from_bytes = int.from_bytes
+_IPV4_MAPPED_PREFIX = bytes(10) + b"\xff\xff"
+
+
+class ParsedIP:
+    """An IP address that was validated and normalized once, so it can be
+    handed around without being parsed again. The classification flags are
+    computed on first access and then kept, as most addresses in a header are
+    never asked for them."""
+
+    __slots__ = ("ip", "version", "packed", "value", "_private", "_loopback")
+
+    def __init__(
+        self, ip: str, version: int, packed: bytes, value: int
+    ) -> None:
+        self.ip = ip
+        self.version = version
+        self.packed = packed
+        self.value = value
+        self._private = None
+        self._loopback = None
+
+    @property
+    def private(self) -> bool:
+        """
+        Returns true if the address is private (or loopback) & not routable
+        """
+        private = self._private
+        if private is None:
+            if self.version == 4:
+                table = defs.IPWARE_NON_PUBLIC_IPV4_RANGES
+            else:
+                table = defs.IPWARE_NON_PUBLIC_IPV6_TABLE
+            private = self._private = self.value in table
+        return private
+
+    @property
+    def public(self) -> bool:
+        """
+        Returns true if the address is public & routable
+        """
+        return not self.private
+
+    @property
+    def loopback(self) -> bool:
+        """
+        Returns true if the address is a loopback address
+        """
+        loopback = self._loopback
+        if loopback is None:
+            if self.version == 4:
+                table = defs.IPWARE_LOOPBACK_IPV4_RANGES
+            else:
+                table = defs.IPWARE_LOOPBACK_IPV6_TABLE
+            loopback = self._loopback = self.value in table
+        return loopback
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ParsedIP):
+            return NotImplemented
+        return self.packed == other.packed
+
+    def __hash__(self) -> int:
+        return hash(self.packed)
+
+    def __str__(self) -> str:
+        return self.ip
+
+    def __repr__(self) -> str:
+        return "{}({!r}, version={})".format(
+            self.__class__.__name__, self.ip, self.version
+        )
+
+
+def canonical_ip(ip: ParsedIP) -> str:
+    """
+    Given a ParsedIP, it returns the canonical spelling of its address: the
+    dotted quad of IPv4 addresses and the lowercase, compressed form of IPv6
+    addresses (RFC 5952), as in `2001:db8::1`
+    """
+    if ip.version == 4:
+        return _inet_ntop(_AF_INET, ip.packed)
+    return _inet_ntop(_AF_INET6, ip.packed)
+
+
+def normalize_ip(ip_str: str) -> str:
+    """
+    Given an address token, it returns the address without the brackets, port
+    or zone ID some proxies add to it, as in `203.0.113.7:51234`,
+    `[2001:db8::5]:443` or `fe80::1%eth0`. Anything else is left untouched
+    """
+    colons = ip_str.count(":")
+    if colons == 0:
+        return ip_str
+    if ip_str[0] == "[":
+        end = ip_str.find("]")
+        if end < 0:
+            return ip_str
+        ip_str = ip_str[1:end]
+    elif colons == 1:
+        # an IPv4 address and a port
+        end = ip_str.find(":")
+        return ip_str[:end]
+    zone = ip_str.find("%")
+    if zone >= 0:
+        ip_str = ip_str[:zone]
+    return ip_str
+
+
+def parse_ip(ip_str: str) -> t.Optional[ParsedIP]:
+    """
+    Given a string, it returns a ParsedIP, or None if it is not a valid IP
+    address. This is the only place where addresses are actually parsed.
+    The string is normalized first (see `normalize_ip`) and IPv4-mapped IPv6
+    addresses (`::ffff:1.2.3.4`, in any spelling) become IPv4 addresses.
+    """
+    ip_str = normalize_ip(ip_str)
+    try:
+        if ":" in ip_str:
+            packed = _inet_pton(_AF_INET6, ip_str)
+            if packed.startswith(_IPV4_MAPPED_PREFIX):
+                packed = packed[12:]
+                return ParsedIP(
+                    _inet_ntop(_AF_INET, packed),
+                    4,
+                    packed,
+                    _unpack_ipv4(packed)[0],
+                )
+            return ParsedIP(ip_str, 6, packed, _int_from_bytes(packed, "big"))
+        packed = _inet_pton(_AF_INET, ip_str)
+        return ParsedIP(ip_str, 4, packed, _unpack_ipv4(packed)[0])
+    except (OSError, ValueError):
+        return None
+
+
+__all__ = ("ParsedIP", "canonical_ip", "normalize_ip", "parse_ip")
@@ -0,0 +1,147 @@
+import sys
+import typing as t
+from collections import OrderedDict
+from functools import lru_cache
+
+from .address import ParsedIP
+from .address import canonical_ip
+
+
+class LRUCache:
+    """A size-bounded, least recently used cache in front of a function of a
+    single hashable argument. It is a thin layer over ``functools.lru_cache``
+    (so lookups happen in C and are safe to share between threads), adding
+    per-instance statistics and an explicit :meth:`clear`."""
+
+    __slots__ = ("func", "maxsize", "lookup")
+
+    def __init__(self, func: t.Callable, maxsize: int = 4096) -> None:
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError(
+                "maxsize must be a positive integer, got {!r}".format(maxsize)
+            )
+        self.func = func
+        self.maxsize = maxsize
+        # exposed so hot paths can bind it and skip a method call
+        self.lookup = lru_cache(maxsize=maxsize)(func)
+
+    def __call__(self, key: t.Hashable) -> t.Any:
+        return self.lookup(key)
+
+    def __len__(self) -> int:
+        return self.lookup.cache_info().currsize
+
+    def __repr__(self) -> str:
+        return "{}({!r}, maxsize={!r})".format(
+            self.__class__.__name__, self.func, self.maxsize
+        )
+
+    @property
+    def hits(self) -> int:
+        return self.lookup.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self.lookup.cache_info().misses
+
+    def clear(self) -> None:
+        """
+        Drops every cached entry and resets the statistics
+        """
+        self.lookup.cache_clear()
+
+    def stats(self) -> t.Dict[str, t.Union[int, float]]:
+        """
+        Returns a dict of hits, misses, size, maxsize and hit_rate
+        """
+        info = self.lookup.cache_info()
+        total = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": self.maxsize,
+            "hit_rate": info.hits / total if total else 0.0,
+        }
+
+
+class InternTable:
+    """A size-bounded table of canonical address strings, keyed by packed
+    address. Every spelling of an address (``2001:DB8:0::1`` and
+    ``2001:db8::1``, say) resolves to the very same string object, so the
+    client IPs handed out are cheap to hash and compare, and do not pile up
+    as copies in the rate limiters and caches keyed by them. Once full, the
+    oldest entry makes room for a new one."""
+
+    __slots__ = ("maxsize", "hits", "misses", "_table")
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError(
+                "maxsize must be a positive integer, got {!r}".format(maxsize)
+            )
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._table = OrderedDict()  # type: t.Dict[bytes, str]
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __repr__(self) -> str:
+        return "{}(maxsize={!r})".format(self.__class__.__name__, self.maxsize)
+
+    def intern(self, ip: ParsedIP) -> str:
+        """
+        Given a ParsedIP, it returns the canonical string of its address,
+        the same object for as long as it stays in the table
+        """
+        table = self._table
+        canonical = table.get(ip.packed)
+        if canonical is not None:
+            self.hits += 1
+            return canonical
+        self.misses += 1
+        canonical = canonical_ip(ip)
+        if len(table) >= self.maxsize:
+            try:
+                table.popitem(last=False)
+            except KeyError:  # emptied by another thread meanwhile
+                pass
+        table[ip.packed] = canonical
+        return canonical
+
+    def clear(self) -> None:
+        """
+        Drops every entry and resets the statistics
+        """
+        self._table.clear()
+        self.hits = self.misses = 0
+
+    def footprint(self) -> int:
+        """
+        Returns the approximate memory used by the table, in bytes: the
+        table itself plus its keys and strings
+        """
+        getsizeof = sys.getsizeof
+        return getsizeof(self._table) + sum(
+            getsizeof(key) + getsizeof(value)
+            for key, value in list(self._table.items())
+        )
+
+    def stats(self) -> t.Dict[str, t.Union[int, float]]:
+        """
+        Returns a dict of hits, misses, size, maxsize, hit_rate and bytes
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._table),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self.footprint(),
+        }
+
+
+__all__ = ("LRUCache", "InternTable")
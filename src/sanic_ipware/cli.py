@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import typing as t
+from collections import deque
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+
+from .extension import resolver_from_config
+from .resolver import PROXY_ORDERS
+
+FORMATS = ("jsonl", "combined")
+
+# every double quoted field of a combined log line: the request line, the
+# referer, the user agent and then any extra fields (like nginx's
+# "$http_x_forwarded_for"), in which `"` is escaped
+_QUOTED_FIELD = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+# the ClientIPResolver and line parser of each worker process, set by
+# `_init_worker`
+_resolver = None  # type: t.Any
+_parse_line = None  # type: t.Any
+
+
+def parse_json_line(line: str, fields: t.Sequence[str]) -> t.Dict[str, str]:
+    """
+    Given a JSON line, it returns the headers in it: the object under the
+    `headers` key or else the whole object. Only string values are kept,
+    lists of them (repeated headers) being joined with commas. An empty dict
+    is returned for lines that can't be parsed
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return {}
+    if not isinstance(record, dict):
+        return {}
+    headers = record.get("headers", record)
+    if not isinstance(headers, dict):
+        return {}
+    cleaned = {}
+    for name, value in headers.items():
+        if isinstance(value, list):
+            value = ", ".join(v for v in value if isinstance(v, str))
+        if isinstance(value, str) and value:
+            cleaned[name] = value
+    return cleaned
+
+
+def parse_combined_line(
+    line: str, fields: t.Sequence[str]
+) -> t.Dict[str, str]:
+    """
+    Given a combined log format line, it returns the headers found in the
+    quoted fields after the user agent, named after `fields` in order. Fields
+    logged as `-` are left out
+    """
+    quoted = _QUOTED_FIELD.findall(line)
+    headers = {}
+    for name, value in zip(fields, quoted[3:]):
+        if value and value != "-":
+            headers[name] = value
+    return headers
+
+
+_PARSERS = {"jsonl": parse_json_line, "combined": parse_combined_line}
+
+
+def format_result(result: t.Tuple[t.Optional[str], bool]) -> str:
+    ip, routable = result
+    return "{}\t{}\n".format(ip or "-", "true" if routable else "false")
+
+
+def _init_worker(config: t.Dict[str, t.Any], fmt: str, fields: tuple) -> None:
+    global _resolver, _parse_line
+    _resolver = resolver_from_config(config)
+    _parse_line = partial(_PARSERS[fmt], fields=fields)
+
+
+def _process_chunk(lines: t.List[str]) -> str:
+    results = _resolver.resolve_many(map(_parse_line, lines))
+    return "".join(map(format_result, results))
+
+
+def _chunks(lines: t.Iterable[str], size: int) -> t.Iterator[t.List[str]]:
+    lines = iter(lines)
+    chunk = list(islice(lines, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(lines, size))
+
+
+def _imap(
+    pool: t.Any, chunks: t.Iterator[t.List[str]], window: int
+) -> t.Iterator[t.Tuple[int, str]]:
+    """
+    Yields (Lines, Text) for every chunk, in order. No more than `window`
+    chunks are read ahead of the one being written, so a slow output makes
+    the input wait instead of piling results up in memory
+    """
+    pending = deque()  # type: t.Deque[t.Tuple[int, t.Any]]
+    for chunk in chunks:
+        result = pool.apply_async(_process_chunk, (chunk,))
+        pending.append((len(chunk), result))
+        if len(pending) >= window:
+            size, result = pending.popleft()
+            yield size, result.get()
+    while pending:
+        size, result = pending.popleft()
+        yield size, result.get()
+
+
+def process(
+    lines: t.Iterable[str],
+    output: t.TextIO,
+    config: t.Dict[str, t.Any],
+    fmt: str = "jsonl",
+    fields: t.Sequence[str] = ("X-Forwarded-For",),
+    workers: int = 1,
+    chunk_size: int = 10000,
+) -> int:
+    """
+    Resolves the client IP of every log line, writing one `<IP>\\t<Routable>`
+    line (`-` for no IP) per input line, in order. Lines are handed to
+    `workers` processes in chunks of `chunk_size` (or processed in this very
+    process, with a single worker), with at most two chunks per worker read
+    ahead of the output. Returns the number of lines processed
+    """
+    initargs = (config, fmt, tuple(fields))
+    count = 0
+    if workers > 1:
+        chunks = _chunks(lines, chunk_size)
+        with Pool(workers, _init_worker, initargs) as pool:
+            for chunk, text in _imap(pool, chunks, 2 * workers):
+                output.write(text)
+                count += chunk
+    else:
+        _init_worker(*initargs)
+        for chunk in _chunks(lines, chunk_size):
+            output.write(_process_chunk(chunk))
+            count += len(chunk)
+    return count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m sanic_ipware",
+        description=(
+            "Resolves the client IP address of every line of an access log, "
+            "writing `<IP>\\t<Routable>` lines to the output"
+        ),
+    )
+    parser.add_argument(
+        "input",
+        nargs="*",
+        default=["-"],
+        help="log files to read (default: standard input)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="file to write to (default: standard output)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        default="jsonl",
+        help=(
+            "jsonl: one JSON object per line, with its headers under a "
+            "`headers` key or at the top level; combined: combined log "
+            "format, with extra quoted fields named by --fields"
+        ),
+    )
+    parser.add_argument(
+        "--fields",
+        default="X-Forwarded-For",
+        help=(
+            "comma separated header names of the quoted fields after the "
+            "user agent, for the combined format (default: X-Forwarded-For)"
+        ),
+    )
+    parser.add_argument("--proxy-order", choices=PROXY_ORDERS)
+    parser.add_argument("--proxy-count", type=int)
+    parser.add_argument(
+        "--proxy-trusted-ips",
+        help="comma separated trusted proxy addresses or networks",
+    )
+    parser.add_argument(
+        "--request-header-order",
+        help="comma separated header names, in order of precedence",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=65536,
+        help="parsed addresses cached by each worker (default: 65536)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10000,
+        help="lines handed to a worker at a time (default: 10000)",
+    )
+    return parser
+
+
+def _read_lines(paths: t.Sequence[str]) -> t.Iterator[str]:
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+        else:
+            with open(path, encoding="utf-8", errors="replace") as lines:
+                yield from lines
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    config = {
+        "IPWARE_PROXY_ORDER": args.proxy_order,
+        "IPWARE_PROXY_COUNT": args.proxy_count,
+        "IPWARE_PROXY_TRUSTED_IPS": args.proxy_trusted_ips,
+        "IPWARE_META_PRECEDENCE_ORDER": args.request_header_order,
+        "IPWARE_CACHE_SIZE": args.cache_size or None,
+    }
+    fields = [name.strip() for name in args.fields.split(",") if name.strip()]
+    # fail here, not in every worker, on a bad configuration
+    try:
+        resolver_from_config(config)
+    except ValueError as error:
+        parser.error(str(error))
+
+    output = (
+        sys.stdout
+        if args.output == "-"
+        else open(args.output, "w", encoding="utf-8")
+    )
+    started = time.perf_counter()
+    try:
+        count = process(
+            _read_lines(args.input),
+            output,
+            config,
+            fmt=args.format,
+            fields=fields,
+            workers=max(args.workers, 1),
+            chunk_size=max(args.chunk_size, 1),
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(
+        "{:,} lines in {:.2f}s ({:,.0f} lines/sec)".format(
+            count, elapsed, count / elapsed if elapsed else 0
+        ),
+        file=sys.stderr,
+    )
+    return 0
+
+
+__all__ = (
+    "FORMATS",
+    "parse_json_line",
+    "parse_combined_line",
+    "format_result",
+    "process",
+    "build_parser",
+    "main",
+)
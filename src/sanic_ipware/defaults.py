@@ -1,5 +1,12 @@
 import re
+import sys
+import types
 
+from .iana import load_special_registry
+from .iana import reserved_networks
+from .ranges import PrefixTable
+from .ranges import RangeTable
+from .ranges import parse_network
 from .trie import Trie
 
 # Search for the real IP address in the following order
@@ -179,17 +186,167 @@ IPWARE_LOOPBACK_PREFIX = (
 
 IPWARE_NON_PUBLIC_IP_PREFIX = IPWARE_PRIVATE_IP_PREFIX + IPWARE_LOOPBACK_PREFIX
 
+# The same IPv4 address space as `IPWARE_PRIVATE_IPV4_PREFIX` and
+# `IPWARE_LOOPBACK_IPV4_PREFIX`, but as networks, so whole blocks (like the
+# carrier-grade NAT 100.64.0.0/10) don't have to be enumerated
+IPWARE_PRIVATE_IPV4_NETWORKS = (
+    "0.0.0.0/8",  # messages to software
+    "10.0.0.0/8",  # class A private block
+    "100.64.0.0/10",  # carrier-grade NAT
+    "169.254.0.0/16",  # link-local block
+    "172.16.0.0/12",  # class B private blocks
+    "192.0.0.0/24",  # reserved for IANA special purpose address registry
+    "192.0.2.0/24",  # reserved for documentation and example code
+    "192.168.0.0/16",  # class C private block
+    "198.18.0.0/15",  # reserved for inter-network communications
+    "198.51.100.0/24",  # reserved for documentation and example code
+    "203.0.113.0/24",  # reserved for documentation and example code
+    "224.0.0.0/4",  # multicast
+    "240.0.0.0/4",  # reserved
+)
+
+IPWARE_LOOPBACK_IPV4_NETWORKS = ("127.0.0.0/8",)  # IPv4 loopback device (Host)
+
+# The IPv6 address space of `IPWARE_PRIVATE_IPV6_PREFIX` and
+# `IPWARE_LOOPBACK_IPV6_PREFIX` as networks; these are matched against the
+# address itself and not its textual form (`FC00::1`, `fc00:0::1` and
+# `fc00::1` are all the same address)
+IPWARE_PRIVATE_IPV6_NETWORKS = (
+    "::/128",  # Unspecified address
+    "::ffff:0:0/96",  # messages to software (IPv4-mapped addresses)
+    "2001:10::/28",  # messages to software (ORCHID)
+    "2001:20::/28",  # messages to software (ORCHIDv2)
+    "2001::/32",  # TEREDO
+    "2001:2::/48",  # benchmarking
+    "2001:db8::/32",  # reserved for documentation and example code
+    "fc00::/7",  # IPv6 private block (unique local, fc00::/8 and fd00::/8)
+    "fe80::/10",  # link-local unicast
+    "ff00::/8",  # IPv6 multicast
+)
+
+IPWARE_LOOPBACK_IPV6_NETWORKS = ("::1/128",)  # IPv6 loopback device (Host)
+
+# --------------------------------------------------------------------------- #
+# LOAD THE IANA SPECIAL-PURPOSE ADDRESS REGISTRIES
+# --------------------------------------------------------------------------- #
+
+# the networks in them that are not globally reachable (and not listed above)
+# are classified as private as well; see `sanic_ipware.iana` to refresh them
+
+
+def _build_special_registry():
+    return load_special_registry()
+
+
+def _build_reserved_networks():
+    _, blocks = _this.IPWARE_SPECIAL_REGISTRY
+    return tuple(reserved_networks(blocks))
+
+
+def _build_reserved_ipv4_networks():
+    return tuple(
+        net for net in _this.IPWARE_RESERVED_NETWORKS if ":" not in net
+    )
+
+
+def _build_reserved_ipv6_networks():
+    return tuple(net for net in _this.IPWARE_RESERVED_NETWORKS if ":" in net)
+
+
+# --------------------------------------------------------------------------- #
+# BUILD INTEGER RANGE TABLES OF IPV4 NETWORKS
+# --------------------------------------------------------------------------- #
+
+
+def _build_loopback_ipv4_ranges():
+    return RangeTable(
+        parse_network(net)[1:] for net in IPWARE_LOOPBACK_IPV4_NETWORKS
+    )
+
+
+def _build_non_public_ipv4_ranges():
+    return RangeTable(
+        parse_network(net)[1:]
+        for net in IPWARE_PRIVATE_IPV4_NETWORKS
+        + IPWARE_LOOPBACK_IPV4_NETWORKS
+        + _this.IPWARE_RESERVED_IPV4_NETWORKS
+    )
+
+
+# --------------------------------------------------------------------------- #
+# BUILD PREFIX TABLES OF IPV6 NETWORKS
+# --------------------------------------------------------------------------- #
+
+
+def _build_loopback_ipv6_table():
+    return PrefixTable.from_networks(IPWARE_LOOPBACK_IPV6_NETWORKS)
+
+
+def _build_non_public_ipv6_table():
+    return PrefixTable.from_networks(
+        IPWARE_PRIVATE_IPV6_NETWORKS
+        + IPWARE_LOOPBACK_IPV6_NETWORKS
+        + _this.IPWARE_RESERVED_IPV6_NETWORKS
+    )
+
+
 # --------------------------------------------------------------------------- #
 # BUILD REGEX TRIE OF IPV4 ADDRESSES
 # --------------------------------------------------------------------------- #
 
-_tree = Trie()
 
-for ip in IPWARE_PRIVATE_IPV4_PREFIX + IPWARE_LOOPBACK_IPV4_PREFIX:
-    _tree.add(ip)
+def _build_ipv4_regex():
+    tree = Trie()
+    for ip in IPWARE_PRIVATE_IPV4_PREFIX + IPWARE_LOOPBACK_IPV4_PREFIX:
+        tree.add(ip)
+    return re.compile("^{}.*".format(tree.pattern()))
+
+
+# --------------------------------------------------------------------------- #
+# BUILD ON FIRST ACCESS
+# --------------------------------------------------------------------------- #
+
+
+class _Lazy:
+    """A module attribute built by `builder` on first access. The result is
+    then stored in the module namespace, which takes precedence over this
+    (non-data) descriptor, so later lookups cost nothing extra."""
+
+    def __init__(self, builder):
+        self.builder = builder
+
+    def __get__(self, module, owner=None):
+        if module is None:
+            return self
+        value = module.__dict__[self.name] = self.builder()
+        return value
+
+
+class _DefaultsModule(types.ModuleType):
+    # none of these are needed to import sanic_ipware (and many processes
+    # never classify an address at all), so worker startup does not pay for
+    # reading the registry file, parsing networks, building the trie or
+    # compiling its regex
+    IPWARE_SPECIAL_REGISTRY = _Lazy(_build_special_registry)
+    IPWARE_RESERVED_NETWORKS = _Lazy(_build_reserved_networks)
+    IPWARE_RESERVED_IPV4_NETWORKS = _Lazy(_build_reserved_ipv4_networks)
+    IPWARE_RESERVED_IPV6_NETWORKS = _Lazy(_build_reserved_ipv6_networks)
+    IPWARE_LOOPBACK_IPV4_RANGES = _Lazy(_build_loopback_ipv4_ranges)
+    IPWARE_NON_PUBLIC_IPV4_RANGES = _Lazy(_build_non_public_ipv4_ranges)
+    IPWARE_LOOPBACK_IPV6_TABLE = _Lazy(_build_loopback_ipv6_table)
+    IPWARE_NON_PUBLIC_IPV6_TABLE = _Lazy(_build_non_public_ipv6_table)
+    IPWARE_IPV4_REGEX = _Lazy(_build_ipv4_regex)
+
 
-IPWARE_IPV4_REGEX = re.compile("^{}.*".format(_tree.pattern()))
+# python 3.5 has no __set_name__
+for _name, _attribute in vars(_DefaultsModule).items():
+    if isinstance(_attribute, _Lazy):
+        _attribute.name = _name
+del _name, _attribute
 
+# lazy attributes must be looked up through the module object, not globals()
+_this = sys.modules[__name__]
+_this.__class__ = _DefaultsModule
 
 __all__ = (
     "IPWARE_META_PRECEDENCE_ORDER",
@@ -200,4 +357,8 @@ __all__ = (
     "IPWARE_LOOPBACK_IPV6_PREFIX",
     "IPWARE_LOOPBACK_PREFIX",
     "IPWARE_NON_PUBLIC_IP_PREFIX",
+    "IPWARE_PRIVATE_IPV4_NETWORKS",
+    "IPWARE_LOOPBACK_IPV4_NETWORKS",
+    "IPWARE_PRIVATE_IPV6_NETWORKS",
+    "IPWARE_LOOPBACK_IPV6_NETWORKS",
 )
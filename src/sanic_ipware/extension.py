@@ -0,0 +1,160 @@
+import typing as t
+
+from .resolver import ClientIPResolver
+
+# app.config key -> ClientIPResolver argument
+CONFIG_OPTIONS = (
+    ("IPWARE_PROXY_ORDER", "proxy_order"),
+    ("IPWARE_PROXY_COUNT", "proxy_count"),
+    ("IPWARE_PROXY_TRUSTED_IPS", "proxy_trusted_ips"),
+    ("IPWARE_META_PRECEDENCE_ORDER", "request_header_order"),
+    ("IPWARE_CACHE_SIZE", "cache_size"),
+    ("IPWARE_RESULT_CACHE_SIZE", "result_cache_size"),
+    ("IPWARE_MAX_HEADER_LENGTH", "max_header_length"),
+    ("IPWARE_MAX_HOPS", "max_hops"),
+    ("IPWARE_HEADER_PARSERS", "header_parsers"),
+    ("IPWARE_INTERN_SIZE", "intern_size"),
+)
+
+_LIST_OPTIONS = ("proxy_trusted_ips", "request_header_order")
+_MAPPING_OPTIONS = ("header_parsers",)
+_INT_OPTIONS = (
+    "proxy_count",
+    "cache_size",
+    "result_cache_size",
+    "max_header_length",
+    "max_hops",
+    "intern_size",
+)
+
+
+def resolver_from_config(config: t.Mapping[str, t.Any]) -> ClientIPResolver:
+    """
+    Given a mapping (usually app.config), it returns a ClientIPResolver
+    configured from the `IPWARE_*` keys in it. Values may also be strings, as
+    they come from environment variables, with lists separated by commas and
+    mappings written as `name=value` items of such a list
+    """
+    options = {}
+    for key, option in CONFIG_OPTIONS:
+        value = config.get(key)
+        if value is None:
+            continue
+        if isinstance(value, str):
+            if option in _LIST_OPTIONS:
+                value = [v.strip() for v in value.split(",") if v.strip()]
+            elif option in _MAPPING_OPTIONS:
+                items = [
+                    v.partition("=") for v in value.split(",") if v.strip()
+                ]
+                value = {k.strip(): v.strip() for k, _, v in items}
+            elif option in _INT_OPTIONS:
+                value = int(value)
+        options[option] = value
+    return ClientIPResolver(**options)
+
+
+class ClientIP:
+    """The client IP address of a request, resolved on first access."""
+
+    __slots__ = ("_resolver", "_headers", "_result")
+
+    def __init__(self, resolver: ClientIPResolver, headers: t.Any) -> None:
+        self._resolver = resolver
+        self._headers = headers
+        self._result = None
+
+    @property
+    def result(self) -> t.Tuple[t.Optional[str], bool]:
+        """
+        Returns the tuple of (IP, Routable), resolving it on first access
+        """
+        result = self._result
+        if result is None:
+            result = self._result = self._resolver.resolve_headers(
+                self._headers
+            )
+            self._headers = None
+        return result
+
+    @property
+    def ip(self) -> t.Optional[str]:
+        return self.result[0]
+
+    @property
+    def routable(self) -> bool:
+        return self.result[1]
+
+    @property
+    def resolved(self) -> bool:
+        return self._result is not None
+
+    def __iter__(self) -> t.Iterator:
+        return iter(self.result)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ClientIP):
+            return self.result == other.result
+        return self.result == other
+
+    def __hash__(self) -> int:
+        return hash(self.result)
+
+    def __repr__(self) -> str:
+        if self._result is None:
+            return "<{} (unresolved)>".format(self.__class__.__name__)
+        return "<{} ip={!r} routable={!r}>".format(
+            self.__class__.__name__, *self._result
+        )
+
+
+class IPware:
+    """Sanic extension that adds a request middleware storing a lazily
+    resolved :class:`ClientIP` on every request (as ``request.ctx.client_ip``
+    or, on Sanic versions without ``request.ctx``, ``request["client_ip"]``),
+    so handlers, loggers and rate limiters share a single resolution.
+
+    The resolver is built from ``app.config`` (see ``CONFIG_OPTIONS``) unless
+    one is given."""
+
+    def __init__(
+        self,
+        app: t.Optional[t.Any] = None,
+        resolver: t.Optional[ClientIPResolver] = None,
+        attribute: str = "client_ip",
+    ) -> None:
+        self.resolver = resolver
+        self.attribute = attribute
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: t.Any) -> None:
+        if self.resolver is None:
+            self.resolver = resolver_from_config(app.config)
+        app.register_middleware(self.on_request, "request")
+
+    def on_request(self, request: t.Any) -> None:
+        client_ip = ClientIP(self.resolver, request.headers)
+        ctx = getattr(request, "ctx", None)
+        if ctx is not None:
+            setattr(ctx, self.attribute, client_ip)
+        else:
+            request[self.attribute] = client_ip
+
+    def client_ip(self, request: t.Any) -> ClientIP:
+        """
+        Given a request, it returns its ClientIP, creating it if the
+        middleware did not run (yet) for that request
+        """
+        ctx = getattr(request, "ctx", None)
+        if ctx is not None:
+            client_ip = getattr(ctx, self.attribute, None)
+        else:
+            client_ip = request.get(self.attribute)
+        if client_ip is None:
+            self.on_request(request)
+            return self.client_ip(request)
+        return client_ip
+
+
+__all__ = ("CONFIG_OPTIONS", "resolver_from_config", "ClientIP", "IPware")
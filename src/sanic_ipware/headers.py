@@ -0,0 +1,373 @@
+import re
+import typing as t
+from collections import namedtuple
+
+from . import utils as util
+from .address import ParsedIP
+from .address import normalize_ip
+from .address import parse_ip
+
+try:
+    from multidict import CIMultiDict
+    from multidict import CIMultiDictProxy
+except ImportError:  # pragma: no cover
+    _CASE_INSENSITIVE = ()  # type: tuple
+else:
+    # mappings whose `get` is case-insensitive, like the headers of a request
+    _CASE_INSENSITIVE = (CIMultiDict, CIMultiDictProxy)
+
+# https://tools.ietf.org/html/rfc7239#section-4
+# Forwarded: for=192.0.2.60;proto=http;by=203.0.113.43, for="[2001:db8::1]"
+# without quoted strings around, a single regex pass finds every `for=`
+_FORWARDED_FOR = re.compile(r"(?:^|[;,])\s*for\s*=\s*([^;,\s]*)", re.I)
+
+# with quoted strings (which may contain `;` and `,`) every pair is matched
+# in sequence: separator, name, value (token or quoted string)
+_FORWARDED_PAIR = re.compile(
+    r"""[\s;,]*([!#$%&'*+.^_`|~0-9a-zA-Z-]+)\s*=\s*"""
+    r"""("(?:[^"\\]|\\.)*"|[^;,\s"]*)\s*([;,]?)"""
+)
+_QUOTED_PAIR = re.compile(r"\\(.)")
+
+# comments of a Via header, which may contain commas
+_VIA_COMMENT = re.compile(r"\([^)]*\)")
+
+
+def _forwarded_node_address(node: str) -> str:
+    """
+    Given the value of a `for=` (or `by=`) parameter, it returns the address
+    part of it: quotes, brackets and port are removed. Obfuscated identifiers
+    (like `unknown` or `_hidden`) are returned as they are
+    """
+    if node.startswith('"'):
+        node = node[1:-1]
+        if "\\" in node:
+            node = _QUOTED_PAIR.sub(r"\1", node)
+    return normalize_ip(node)
+
+
+def parse_forwarded(value: str) -> t.List[str]:
+    """
+    Given the value of a Forwarded header, it returns the list of addresses
+    (or obfuscated identifiers) of the `for=` parameters in it, lowercased
+    and without quotes, brackets or ports. An empty list is returned if the
+    header can't be parsed
+    """
+    if '"' not in value:
+        nodes = _FORWARDED_FOR.findall(value)
+    else:
+        nodes = []
+        pos = 0
+        end = len(value.rstrip())
+        while pos < end:
+            match = _FORWARDED_PAIR.match(value, pos)
+            if match is None:
+                return []
+            name, node, separator = match.groups()
+            if name.lower() == "for":
+                nodes.append(node)
+            pos = match.end()
+            if not separator and pos < end:
+                return []
+    return [_forwarded_node_address(node).lower() for node in nodes]
+
+
+def _scan_nodes(
+    nodes: t.List[str],
+) -> t.Tuple[t.Optional[str], t.Optional[str], int]:
+    nodes = [node for node in nodes if node]
+    if not nodes:
+        return None, None, 0
+    return nodes[0], nodes[-1], len(nodes)
+
+
+def _walk_nodes(
+    nodes: t.List[str],
+    trusted: t.Any,
+    parse: t.Callable,
+    max_skip: t.Optional[int],
+) -> t.Optional[ParsedIP]:
+    skip = 0 if trusted is None else -1 if max_skip is None else max_skip
+    contains = None if trusted is None else trusted.contains
+    ip = None
+    for node in reversed(nodes):
+        if node:
+            ip = parse(node)
+            if ip is None or skip == 0 or not contains(ip.version, ip.value):
+                return ip
+            skip -= 1
+    return ip
+
+
+def scan_forwarded(
+    value: str,
+    max_length: t.Optional[int] = None,
+    max_count: t.Optional[int] = None,
+) -> t.Tuple[t.Optional[str], t.Optional[str], int]:
+    """
+    Given the value of a Forwarded header, it returns a tuple of
+    (First, Last, Count) of the `for=` addresses in it, or (None, None, 0) if
+    there are none, just like `utils.scan_ips_from_string`
+    """
+    if max_length is not None and len(value) > max_length:
+        return None, None, 0
+    if max_count is not None and value.count(",") >= max_count:
+        return None, None, 0
+    return _scan_nodes(parse_forwarded(value))
+
+
+def walk_forwarded(
+    value: str,
+    trusted: t.Any = None,
+    parse: t.Callable = parse_ip,
+    max_skip: t.Optional[int] = None,
+    max_length: t.Optional[int] = None,
+    max_count: t.Optional[int] = None,
+) -> t.Optional[ParsedIP]:
+    """
+    Given the value of a Forwarded header, it returns the ParsedIP of the
+    right-most `for=` address not in trusted, just like
+    `utils.walk_ips_from_string`. Obfuscated identifiers can't be trusted
+    (nor returned), so reaching one gives None
+    """
+    if max_length is not None and len(value) > max_length:
+        return None
+    if max_count is not None and value.count(",") >= max_count:
+        return None
+    return _walk_nodes(parse_forwarded(value), trusted, parse, max_skip)
+
+
+# https://tools.ietf.org/html/rfc7230#section-5.7.1
+# Via: 1.0 fred, 1.1 p.example.net (Apache/1.1), HTTP/1.1 [2001:db8::1]:8080
+def parse_via(value: str) -> t.List[str]:
+    """
+    Given the value of a Via header, it returns the list of `received-by`
+    hosts in it (addresses or pseudonyms), lowercased and without brackets or
+    ports. Comments are dropped, and entries made of a bare address (with
+    no protocol) are taken as they are
+    """
+    if "(" in value:
+        value = _VIA_COMMENT.sub("", value)
+    nodes = []
+    for entry in value.split(","):
+        parts = entry.split()
+        if parts:
+            node = parts[1] if len(parts) > 1 else parts[0]
+            nodes.append(normalize_ip(node).lower())
+    return nodes
+
+
+def scan_via(
+    value: str,
+    max_length: t.Optional[int] = None,
+    max_count: t.Optional[int] = None,
+) -> t.Tuple[t.Optional[str], t.Optional[str], int]:
+    """
+    Given the value of a Via header, it returns a tuple of (First, Last,
+    Count) of the `received-by` hosts in it, or (None, None, 0) if there are
+    none, just like `utils.scan_ips_from_string`
+    """
+    if max_length is not None and len(value) > max_length:
+        return None, None, 0
+    if max_count is not None and value.count(",") >= max_count:
+        return None, None, 0
+    return _scan_nodes(parse_via(value))
+
+
+def walk_via(
+    value: str,
+    trusted: t.Any = None,
+    parse: t.Callable = parse_ip,
+    max_skip: t.Optional[int] = None,
+    max_length: t.Optional[int] = None,
+    max_count: t.Optional[int] = None,
+) -> t.Optional[ParsedIP]:
+    """
+    Given the value of a Via header, it returns the ParsedIP of the
+    right-most `received-by` address not in trusted, just like
+    `utils.walk_ips_from_string`. Pseudonyms can't be trusted (nor
+    returned), so reaching one gives None
+    """
+    if max_length is not None and len(value) > max_length:
+        return None
+    if max_count is not None and value.count(",") >= max_count:
+        return None
+    return _walk_nodes(parse_via(value), trusted, parse, max_skip)
+
+
+def scan_single(
+    value: str,
+    max_length: t.Optional[int] = None,
+    max_count: t.Optional[int] = None,
+) -> t.Tuple[t.Optional[str], t.Optional[str], int]:
+    """
+    Given the value of a header holding a single address (like X-Real-IP),
+    it returns a tuple of (First, Last, Count), just like
+    `utils.scan_ips_from_string`, without looking for separators. Values
+    with a comma in them are handed to `utils.scan_ips_from_string` all the
+    same, so a misbehaving proxy gives the same results as before
+    """
+    if "," in value:
+        return util.scan_ips_from_string(value, max_length, max_count)
+    if max_length is not None and len(value) > max_length:
+        return None, None, 0
+    ip = value.strip().lower()
+    if ip:
+        return ip, ip, 1
+    return None, None, 0
+
+
+def walk_single(
+    value: str,
+    trusted: t.Any = None,
+    parse: t.Callable = parse_ip,
+    max_skip: t.Optional[int] = None,
+    max_length: t.Optional[int] = None,
+    max_count: t.Optional[int] = None,
+) -> t.Optional[ParsedIP]:
+    """
+    Given the value of a header holding a single address, it returns its
+    ParsedIP (as there is nothing to skip), or None if it is not valid. As
+    with `scan_single`, values with a comma in them are handed to
+    `utils.walk_ips_from_string`
+    """
+    if "," in value:
+        return util.walk_ips_from_string(
+            value, trusted, parse, max_skip, max_length, max_count
+        )
+    if max_length is not None and len(value) > max_length:
+        return None
+    ip = value.strip().lower()
+    return parse(ip) if ip else None
+
+
+# the grammar of a header: how to find the (First, Last, Count) addresses in
+# its values and how to walk them from the right, skipping trusted proxies
+HeaderParser = namedtuple("HeaderParser", ("name", "scan", "walk"))
+
+HEADER_PARSERS = {
+    parser.name: parser
+    for parser in (
+        HeaderParser(
+            "list", util.scan_ips_from_string, util.walk_ips_from_string
+        ),
+        HeaderParser("single", scan_single, walk_single),
+        HeaderParser("forwarded", scan_forwarded, walk_forwarded),
+        HeaderParser("via", scan_via, walk_via),
+    )
+}
+
+# lowercase header name -> parser; anything else is a comma separated list
+DEFAULT_HEADER_PARSERS = {
+    "x-real-ip": "single",
+    "x-client-ip": "single",
+    "true-client-ip": "single",
+    "cf-connecting-ip": "single",
+    "fastly-client-ip": "single",
+    "forwarded": "forwarded",
+    "via": "via",
+}
+
+
+def get_header_parser(
+    header: str,
+    parsers: t.Optional[t.Mapping[str, t.Union[str, HeaderParser]]] = None,
+) -> HeaderParser:
+    """
+    Given a header name, it returns the HeaderParser for it: the one given
+    for it in parsers (by name, as in `HEADER_PARSERS`, or a HeaderParser of
+    your own), if any, or else the default one
+    """
+    name = header.lower()
+    parser = None
+    if parsers:
+        for key, value in parsers.items():
+            if key.lower() == name:
+                parser = value
+    if parser is None:
+        parser = DEFAULT_HEADER_PARSERS.get(name, "list")
+    if isinstance(parser, HeaderParser):
+        return parser
+    try:
+        return HEADER_PARSERS[parser]
+    except KeyError:
+        raise ValueError(
+            "unknown parser {!r} for the {} header, expected one of {}".format(
+                parser, header, ", ".join(HEADER_PARSERS)
+            )
+        ) from None
+
+
+class HeaderPlan:
+    """The lookup of a fixed, ordered set of header names, compiled once.
+
+    Instead of one case-folding ``get`` per configured name (most of which
+    miss on a typical request), :meth:`values` walks the request headers a
+    single time, picking out only the configured names, case-insensitively.
+    Case-insensitive mappings (``CIMultiDict``, as Sanic requests have) with
+    more entries than ``max_scan`` are queried name by name instead, which
+    is cheaper for them; any other mapping (a plain ``dict`` read from a log,
+    an ``OrderedDict``, ...) is always walked."""
+
+    __slots__ = ("names", "max_scan", "_index", "_copies", "_empty")
+
+    def __init__(
+        self, names: t.Iterable[str], max_scan: t.Optional[int] = None
+    ) -> None:
+        self.names = tuple(names)
+        self.max_scan = len(self.names) if max_scan is None else max_scan
+        # lowercase name -> position; a name configured more than once gets
+        # the value found for its first position copied over
+        index = {}
+        copies = []
+        for position, name in enumerate(self.names):
+            first = index.setdefault(name.lower(), position)
+            if first != position:
+                copies.append((position, first))
+        self._index = index
+        self._copies = tuple(copies)
+        self._empty = [None] * len(self.names)
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(self.__class__.__name__, self.names)
+
+    def values(self, headers: t.Any) -> t.Tuple[t.Optional[str], ...]:
+        """
+        Given the headers of a request, it returns the value of each of the
+        configured names (the first one, for repeated headers), in order,
+        stripped, with None for the missing and blank ones
+        """
+        if len(headers) > self.max_scan and isinstance(
+            headers, _CASE_INSENSITIVE
+        ):
+            return tuple(
+                [headers.get(name, "").strip() or None for name in self.names]
+            )
+        values = self._empty[:]
+        index = self._index
+        for name, value in headers.items():
+            position = index.get(name.lower())
+            if position is not None and values[position] is None:
+                values[position] = value.strip()
+        if "" in values:
+            values = [value or None for value in values]
+        for position, first in self._copies:
+            values[position] = values[first]
+        return tuple(values)
+
+
+__all__ = (
+    "parse_forwarded",
+    "scan_forwarded",
+    "walk_forwarded",
+    "parse_via",
+    "scan_via",
+    "walk_via",
+    "scan_single",
+    "walk_single",
+    "HeaderParser",
+    "HEADER_PARSERS",
+    "DEFAULT_HEADER_PARSERS",
+    "get_header_parser",
+    "HeaderPlan",
+)
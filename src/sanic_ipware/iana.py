@@ -0,0 +1,194 @@
+import csv
+import io
+import os
+import re
+import socket
+import typing as t
+from collections import namedtuple
+
+from .ranges import IPV4_BITS
+from .ranges import IPV6_BITS
+from .ranges import RangeTable
+from .ranges import parse_network
+
+# the registry bundled with the package; setting the environment variable
+# IPWARE_SPECIAL_REGISTRY to another file (a fresh copy of the IANA CSV
+# files, concatenated) replaces it, with no new release needed
+BUNDLED_REGISTRY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "data",
+    "iana-special-purpose.csv",
+)
+
+_FOOTNOTE = re.compile(r"\s*\[[^\]]*\]")
+_VERSION = re.compile(r"^#\s*version:\s*(\S+)", re.I)
+
+# shifts of the 16-bit groups of an IPv6 address, first to last
+_SHIFTS = range(112, -1, -16)
+
+SpecialPurposeBlock = namedtuple(
+    "SpecialPurposeBlock",
+    ("network", "name", "terminated", "globally_reachable"),
+)
+
+
+def _reachable(value: str) -> t.Optional[bool]:
+    """
+    Given a "Globally Reachable" cell, it returns True, False or None (N/A or
+    empty), ignoring any footnote
+    """
+    value = _FOOTNOTE.sub("", value).strip().lower()
+    if value == "true":
+        return True
+    if value == "false":
+        return False
+    return None
+
+
+def parse_special_registry(
+    lines: t.Iterable[str],
+) -> t.Tuple[t.Optional[str], t.List[SpecialPurposeBlock]]:
+    """
+    Given the lines of IANA special-purpose address registry CSV files (IPv4,
+    IPv6 or both, one after the other), it returns a tuple of (Version,
+    Blocks). Lines starting with `#` are comments, one of which may carry a
+    `version:`; repeated header rows are skipped and cells with more than one
+    address block give a block for each
+    """
+    version = None
+    rows = []
+    for line in lines:
+        if line.startswith("#"):
+            match = _VERSION.match(line)
+            if match is not None:
+                version = match.group(1)
+        elif line.strip():
+            rows.append(line)
+
+    blocks = []
+    for row in csv.reader(rows):
+        if len(row) < 9 or row[0].strip().lower() == "address block":
+            continue
+        name = row[1].strip()
+        terminated = row[4].strip().upper() not in ("", "N/A")
+        reachable = _reachable(row[8])
+        for network in _FOOTNOTE.sub("", row[0]).split(","):
+            network = network.strip()
+            if network:
+                blocks.append(
+                    SpecialPurposeBlock(network, name, terminated, reachable)
+                )
+    return version, blocks
+
+
+def load_special_registry(
+    path: t.Optional[str] = None,
+) -> t.Tuple[t.Optional[str], t.List[SpecialPurposeBlock]]:
+    """
+    Loads the registry file at path (by default, the one named by the
+    IPWARE_SPECIAL_REGISTRY environment variable or else the bundled one),
+    returning a tuple of (Version, Blocks)
+    """
+    if path is None:
+        path = os.environ.get("IPWARE_SPECIAL_REGISTRY") or (
+            BUNDLED_REGISTRY_PATH
+        )
+    with io.open(path, encoding="utf-8") as lines:
+        return parse_special_registry(lines)
+
+
+def _subtract(
+    ranges: t.Iterable[t.Tuple[int, int]], holes: t.Sequence[t.Tuple[int, int]]
+) -> t.List[t.Tuple[int, int]]:
+    """
+    Given sorted, non-overlapping inclusive ranges of integers, it returns
+    them with every value in holes (sorted, non-overlapping) taken out
+    """
+    result = []
+    for start, end in ranges:
+        for hole_start, hole_end in holes:
+            if hole_end < start or hole_start > end:
+                continue
+            if hole_start > start:
+                result.append((start, hole_start - 1))
+            start = max(start, hole_end + 1)
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def _range_networks(
+    first: int, last: int, bits: int
+) -> t.Iterator[t.Tuple[int, int]]:
+    """
+    Yields the fewest (Address, PrefixLength) networks covering an inclusive
+    range of addresses, in order
+    """
+    while first <= last:
+        # the largest block aligned on first that does not go past last
+        size = first & -first if first else 1 << bits
+        while size > last - first + 1:
+            size >>= 1
+        yield first, bits - size.bit_length() + 1
+        first += size
+
+
+def _format_address(version: int, value: int) -> str:
+    """
+    Returns an integer address spelled as ipaddress does: IPv6 in lowercase,
+    with the longest run of two or more zero groups (the first one, on a tie)
+    compressed
+    """
+    if version == 4:
+        return socket.inet_ntop(socket.AF_INET, value.to_bytes(4, "big"))
+    groups = ["{:x}".format(value >> shift & 0xFFFF) for shift in _SHIFTS]
+    best, best_length = 0, 1
+    run = 0
+    for index, group in enumerate(groups):
+        run = run + 1 if group == "0" else 0
+        if run > best_length:
+            best, best_length = index - run + 1, run
+    if best_length < 2:
+        return ":".join(groups)
+    after = best + best_length
+    return ":".join(groups[:best]) + "::" + ":".join(groups[after:])
+
+
+def reserved_networks(blocks: t.Iterable[SpecialPurposeBlock]) -> t.List[str]:
+    """
+    Given the blocks of a registry, it returns the networks (in CIDR
+    notation, IPv4 first) of all addresses that are not globally reachable:
+    the blocks marked as such or terminated, less any block inside them
+    marked as globally reachable. It all happens on integer ranges, so it
+    is cheap enough for the first request of a worker to pay for
+    """
+    reserved = {4: [], 6: []}
+    reachable = {4: [], 6: []}
+    for block in blocks:
+        version, first, last = parse_network(block.network)
+        if block.globally_reachable is False or (
+            block.terminated and block.globally_reachable is None
+        ):
+            reserved[version].append((first, last))
+        elif block.globally_reachable:
+            reachable[version].append((first, last))
+
+    result = []
+    for version, bits in ((4, IPV4_BITS), (6, IPV6_BITS)):
+        # RangeTable sorts and merges overlapping and adjacent ranges
+        holes = list(RangeTable(reachable[version]))
+        for first, last in _subtract(RangeTable(reserved[version]), holes):
+            result.extend(
+                "{}/{}".format(_format_address(version, address), length)
+                for address, length in _range_networks(first, last, bits)
+            )
+    return result
+
+
+__all__ = (
+    "BUNDLED_REGISTRY_PATH",
+    "SpecialPurposeBlock",
+    "parse_special_registry",
+    "load_special_registry",
+    "reserved_networks",
+)
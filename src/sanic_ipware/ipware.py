@@ -1,7 +1,30 @@
 import typing as t
+from collections import OrderedDict
+from functools import lru_cache
 
-from . import defaults as defs
-from . import utils as util
+from .resolver import ClientIPResolver
+
+# (options, id of the lists given) -> (lists, their lengths, resolver); the
+# lists are kept referenced, so their ids can't be reused while cached
+_RESOLVERS_BY_IDENTITY = OrderedDict()  # type: OrderedDict
+_IDENTITY_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=32)
+def _get_resolver(
+    proxy_order: str,
+    proxy_count: t.Optional[int],
+    proxy_trusted_ips: t.Optional[t.Tuple[str, ...]],
+    request_header_order: t.Optional[t.Tuple[str, ...]],
+    result_cache_size: t.Optional[int],
+) -> ClientIPResolver:
+    return ClientIPResolver(
+        proxy_order=proxy_order,
+        proxy_count=proxy_count,
+        proxy_trusted_ips=proxy_trusted_ips,
+        request_header_order=request_header_order,
+        result_cache_size=result_cache_size,
+    )
 
 
 def get_client_ip(
@@ -12,56 +35,67 @@ def get_client_ip(
     request_header_order: t.Optional[
         t.Union[t.List[str], t.Tuple[str]]
     ] = None,
+    result_cache_size: t.Optional[int] = None,
 ) -> t.Tuple[t.Optional[str], bool]:
-    client_ip = None
-    routable = False
-
-    if proxy_count is None:
-        proxy_count = -1
-
-    if proxy_trusted_ips is None:
-        proxy_trusted_ips = []
-
-    if request_header_order is None:
-        request_header_order = defs.IPWARE_META_PRECEDENCE_ORDER
-
-    for header in request_header_order:
-        value = util.get_request_header(request, header)
-        if value:
-            ips, ip_count = util.get_ips_from_string(value)
-
-            if ip_count < 1:
-                # we are expecting at least one IP address to process
-                continue
-
-            if proxy_count == 0 and ip_count > 1:
-                # we are not expecting requests via any proxies
-                continue
+    # resolvers are compiled once per distinct set of options; if you are
+    # calling this with the same options over and over, consider creating
+    # your own `ClientIPResolver` instance. With `result_cache_size`, results
+    # are memoized by that resolver, so changing any other option also means
+    # a fresh cache. Passing the very same list objects on every call (a
+    # module level constant, or `functools.partial`) finds the resolver by
+    # their identity, without copying or hashing them, so a list of 5,000
+    # trusted networks costs the same as one of 5; such lists are expected
+    # not to change (other than in length) once used
+    key = (
+        proxy_order,
+        proxy_count,
+        id(proxy_trusted_ips),
+        id(request_header_order),
+        result_cache_size,
+    )
+    lengths = (
+        None if proxy_trusted_ips is None else len(proxy_trusted_ips),
+        None if request_header_order is None else len(request_header_order),
+    )
+    entry = _RESOLVERS_BY_IDENTITY.get(key)
+    if entry is not None and entry[1] == lengths:
+        _RESOLVERS_BY_IDENTITY.move_to_end(key)
+        return entry[2].resolve(request)
 
-            if proxy_count > 0 and proxy_count != ip_count - 1:
-                # we are expecting requests via `proxy_count` number of proxies
-                continue
+    resolver = _get_resolver(
+        proxy_order,
+        proxy_count,
+        None if proxy_trusted_ips is None else tuple(proxy_trusted_ips),
+        None if request_header_order is None else tuple(request_header_order),
+        result_cache_size,
+    )
+    lists = (proxy_trusted_ips, request_header_order)
+    _RESOLVERS_BY_IDENTITY[key] = (lists, lengths, resolver)
+    if len(_RESOLVERS_BY_IDENTITY) > _IDENTITY_CACHE_SIZE:
+        _RESOLVERS_BY_IDENTITY.popitem(last=False)
+    return resolver.resolve(request)
 
-            if proxy_trusted_ips and ip_count < 2:
-                # we are expecting requests via at least one trusted proxy
-                continue
 
-            if proxy_order == "right-most" and ip_count > 1:
-                # we are expecting requests via proxies to be custom as per
-                # `<proxy2>, <proxy1>, <client>`
-                ips.reverse()
-
-            if proxy_trusted_ips:
-                for proxy in proxy_trusted_ips:
-                    if proxy in ips[-1]:
-                        client_ip, routable = util.get_ip_info(ips[0])
-                        if client_ip and routable:
-                            return client_ip, routable
-            else:
-                client_ip, routable = util.get_ip_info(
-                    util.get_best_ip(client_ip, ips[0])
-                )
-                if client_ip and routable:
-                    return client_ip, routable
-
-    return client_ip, routable
+def get_client_ips(
+    headers: t.Iterable[t.Any],
+    proxy_order: str = "left-most",
+    proxy_count: int = None,
+    proxy_trusted_ips: t.List[str] = None,
+    request_header_order: t.Optional[
+        t.Union[t.List[str], t.Tuple[str]]
+    ] = None,
+    cache_size: t.Optional[int] = 4096,
+    result_cache_size: t.Optional[int] = None,
+) -> t.Iterator[t.Tuple[t.Optional[str], bool]]:
+    # the batch counterpart of `get_client_ip`, for header mappings (plain
+    # dicts are fine) instead of requests: a resolver is created for the
+    # batch alone, so its address cache is shared by every item in it
+    resolver = ClientIPResolver(
+        proxy_order=proxy_order,
+        proxy_count=proxy_count,
+        proxy_trusted_ips=proxy_trusted_ips,
+        request_header_order=request_header_order,
+        cache_size=cache_size,
+        result_cache_size=result_cache_size,
+    )
+    return resolver.resolve_many(headers)
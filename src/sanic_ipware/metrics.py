@@ -0,0 +1,150 @@
+import typing as t
+from bisect import bisect_left
+
+# upper bounds (in seconds) of the resolution time histogram buckets, from
+# a single cached lookup up to a pathological header
+DEFAULT_BUCKETS = (
+    0.000001,
+    0.0000025,
+    0.000005,
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+)
+
+
+class ResolverMetrics:
+    """Counters of what a :class:`~sanic_ipware.ClientIPResolver` does: the
+    header each client IP came from, how many present headers were passed
+    over (fall-throughs), how many of them held no usable address (invalid
+    tokens, or refused for their size), how many requests got no IP at all
+    and a histogram of resolution times. Resolvers keep no metrics unless
+    given an instance of this class as ``metrics``.
+
+    Counters are plain attributes, updated without locking: with threads,
+    they are a close estimate rather than an exact count."""
+
+    __slots__ = (
+        "buckets",
+        "requests",
+        "unresolved",
+        "fall_throughs",
+        "invalid_tokens",
+        "header_wins",
+        "duration_sum",
+        "_duration_counts",
+    )
+
+    def __init__(self, buckets: t.Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.clear()
+
+    def __repr__(self) -> str:
+        return "{}(requests={!r})".format(
+            self.__class__.__name__, self.requests
+        )
+
+    def clear(self) -> None:
+        """
+        Resets every counter
+        """
+        self.requests = 0
+        self.unresolved = 0
+        self.fall_throughs = 0
+        self.invalid_tokens = 0
+        self.header_wins = {}  # type: t.Dict[str, int]
+        self.duration_sum = 0.0
+        # one more than the buckets, for anything slower than the last one
+        self._duration_counts = [0] * (len(self.buckets) + 1)
+
+    def observe(
+        self,
+        header: t.Optional[str],
+        fall_throughs: int,
+        invalid_tokens: int,
+        duration: float,
+    ) -> None:
+        """
+        Records a resolution: the header the client IP came from (None if
+        there was none), the number of headers passed over and of headers
+        with no usable address, and how long it took, in seconds
+        """
+        self.requests += 1
+        if header is None:
+            self.unresolved += 1
+        else:
+            wins = self.header_wins
+            wins[header] = wins.get(header, 0) + 1
+        self.fall_throughs += fall_throughs
+        self.invalid_tokens += invalid_tokens
+        self.duration_sum += duration
+        self._duration_counts[bisect_left(self.buckets, duration)] += 1
+
+    def snapshot(self) -> t.Dict[str, t.Any]:
+        """
+        Returns the counters as a plain dict; the `duration` histogram has
+        cumulative `buckets` as (upper bound, count) pairs, the last bound
+        being infinity, like Prometheus histograms
+        """
+        cumulative = []
+        count = 0
+        bounds = self.buckets + (float("inf"),)
+        for bound, bucket in zip(bounds, self._duration_counts):
+            count += bucket
+            cumulative.append((bound, count))
+        return {
+            "requests": self.requests,
+            "unresolved": self.unresolved,
+            "fall_throughs": self.fall_throughs,
+            "invalid_tokens": self.invalid_tokens,
+            "header_wins": dict(self.header_wins),
+            "duration": {
+                "buckets": cumulative,
+                "sum": self.duration_sum,
+                "count": count,
+            },
+        }
+
+
+def samples(
+    snapshot: t.Mapping[str, t.Any], prefix: str = "ipware"
+) -> t.Iterator[t.Tuple[str, t.Dict[str, str], float]]:
+    """
+    Given a snapshot of a resolver (see `ClientIPResolver.snapshot`), it
+    yields (Name, Labels, Value) samples named the way Prometheus does, for
+    exporters or custom collectors to hand over as they are
+    """
+    metrics = snapshot.get("metrics")
+    if metrics is not None:
+        for key in (
+            "requests",
+            "unresolved",
+            "fall_throughs",
+            "invalid_tokens",
+        ):
+            yield "{}_{}_total".format(prefix, key), {}, metrics[key]
+        for header, wins in sorted(metrics["header_wins"].items()):
+            name = "{}_header_wins_total".format(prefix)
+            yield name, {"header": header}, wins
+        name = "{}_resolve_duration_seconds".format(prefix)
+        duration = metrics["duration"]
+        for bound, count in duration["buckets"]:
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield name + "_bucket", {"le": le}, count
+        yield name + "_sum", {}, duration["sum"]
+        yield name + "_count", {}, duration["count"]
+
+    for cache, stats in sorted(snapshot.get("caches", {}).items()):
+        if stats is None:
+            continue
+        labels = {"cache": cache}
+        yield "{}_cache_hits_total".format(prefix), labels, stats["hits"]
+        yield "{}_cache_misses_total".format(prefix), labels, stats["misses"]
+        yield "{}_cache_size".format(prefix), labels, stats["size"]
+
+
+__all__ = ("DEFAULT_BUCKETS", "ResolverMetrics", "samples")
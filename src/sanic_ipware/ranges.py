@@ -0,0 +1,227 @@
+import socket
+import typing as t
+from bisect import bisect_right
+
+IPV4_BITS = 32
+IPV6_BITS = 128
+
+
+def address_to_int(ip_str: str) -> t.Optional[t.Tuple[int, int]]:
+    """
+    Given an IP address string, it returns a tuple of (version, integer) or
+    None if it is not a valid IP address
+    """
+    try:
+        return 4, int.from_bytes(
+            socket.inet_pton(socket.AF_INET, ip_str), "big"
+        )
+    except (OSError, ValueError):
+        pass
+    try:
+        return (
+            6,
+            int.from_bytes(socket.inet_pton(socket.AF_INET6, ip_str), "big"),
+        )
+    except (OSError, ValueError):
+        return None
+
+
+def parse_network(network: str) -> t.Tuple[int, int, int]:
+    """
+    Given a network in CIDR notation (a single address is also accepted), it
+    returns a tuple of (version, first address, last address) as integers.
+    Raises ValueError if network is not a valid IPv4 or IPv6 network
+    """
+    address, _, prefix = network.strip().partition("/")
+    parsed = address_to_int(address)
+    if parsed is not None and (not prefix or prefix.isdigit()):
+        # the usual `address/prefix` notation, without importing ipaddress
+        version, value = parsed
+        bits = IPV4_BITS if version == 4 else IPV6_BITS
+        host_bits = bits - int(prefix) if prefix else 0
+        if 0 <= host_bits <= bits:
+            first = value >> host_bits << host_bits
+            return version, first, first + (1 << host_bits) - 1
+
+    # netmasks, zone IDs and the like (and errors) are left to ipaddress
+    import ipaddress  # only needed for configuration, so not on import
+
+    net = ipaddress.ip_network(network.strip(), strict=False)
+    return (
+        net.version,
+        int(net.network_address),
+        int(net.broadcast_address),
+    )
+
+
+class RangeTable:
+    """A sorted table of non-overlapping, inclusive integer ranges. Adjacent
+    and overlapping ranges are merged on creation, so a lookup is a single
+    bisect, no matter how many ranges were given."""
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, ranges: t.Iterable[t.Tuple[int, int]] = ()) -> None:
+        starts = []
+        ends = []
+        for start, end in sorted(ranges):
+            if ends and start <= ends[-1] + 1:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+        self._starts = starts
+        self._ends = ends
+
+    def __contains__(self, value: int) -> bool:
+        index = bisect_right(self._starts, value) - 1
+        return index >= 0 and value <= self._ends[index]
+
+    def __iter__(self) -> t.Iterator[t.Tuple[int, int]]:
+        return zip(self._starts, self._ends)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(self.__class__.__name__, list(self))
+
+
+class PrefixTable:
+    """A table of network prefixes, indexed by the first 16 bits of the
+    address. Each index entry is either "all addresses match" (for networks
+    with a prefix of 16 bits or less) or the prefixes under it, grouped by
+    length as sets of network addresses shifted right by the number of host
+    bits. A lookup is one dict access plus one set membership test per
+    distinct prefix length under that entry, no matter how many networks
+    were given. Entries with more than ``MAX_GROUPS`` prefix lengths (as
+    left by carving a few addresses out of a large network) are kept as a
+    :class:`RangeTable` instead, for a single bisect."""
+
+    __slots__ = ("bits", "_prefixes", "_head_shift", "_index")
+
+    HEAD_BITS = 16
+    MAX_GROUPS = 8
+
+    def __init__(
+        self, prefixes: t.Iterable[t.Tuple[int, int]] = (), bits: int = 128
+    ) -> None:
+        head_bits = self.HEAD_BITS
+        head_shift = bits - head_bits
+        index = {}
+        unique = set()
+        for network, prefix_length in sorted(prefixes, key=lambda p: p[1]):
+            shift = bits - prefix_length
+            network = network >> shift << shift
+            unique.add((network, prefix_length))
+            head = network >> head_shift
+            if prefix_length <= head_bits:
+                for head in range(
+                    head, head + (1 << head_bits - prefix_length)
+                ):
+                    index[head] = True
+            elif index.get(head) is not True:
+                groups = index.setdefault(head, {})
+                groups.setdefault(shift, set()).add(network >> shift)
+        for head, groups in index.items():
+            if groups is True:
+                continue
+            if len(groups) > self.MAX_GROUPS:
+                index[head] = RangeTable(
+                    (network << shift, (network + 1 << shift) - 1)
+                    for shift, networks in groups.items()
+                    for network in networks
+                )
+            else:
+                index[head] = tuple(
+                    (shift, frozenset(groups[shift]))
+                    for shift in sorted(groups)
+                )
+        self.bits = bits
+        self._prefixes = tuple(sorted(unique))
+        self._head_shift = head_shift
+        self._index = index
+
+    @classmethod
+    def from_networks(
+        cls, networks: t.Iterable[str], version: int = 6
+    ) -> "PrefixTable":
+        bits = IPV4_BITS if version == 4 else IPV6_BITS
+        prefixes = []
+        for network in networks:
+            net_version, first, last = parse_network(network)
+            if net_version != version:
+                raise ValueError(
+                    "{} is not an IPv{} network".format(network, version)
+                )
+            prefixes.append((first, bits - (last - first).bit_length()))
+        return cls(prefixes, bits)
+
+    def __contains__(self, value: int) -> bool:
+        groups = self._index.get(value >> self._head_shift, ())
+        if groups is True:
+            return True
+        if groups.__class__ is RangeTable:
+            return value in groups
+        for shift, prefixes in groups:
+            if value >> shift in prefixes:
+                return True
+        return False
+
+    def __iter__(self) -> t.Iterator[t.Tuple[int, int]]:
+        return iter(self._prefixes)
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def __repr__(self) -> str:
+        return "{}({!r}, bits={!r})".format(
+            self.__class__.__name__, list(self), self.bits
+        )
+
+
+class NetworkIndex:
+    """An index of IPv4 and IPv6 networks (in CIDR notation) that answers if
+    a given address belongs to any of them."""
+
+    __slots__ = ("networks", "ipv4", "ipv6")
+
+    def __init__(self, networks: t.Iterable[str] = ()) -> None:
+        self.networks = tuple(networks)
+        ranges = {4: [], 6: []}
+        for network in self.networks:
+            version, first, last = parse_network(network)
+            ranges[version].append((first, last))
+        self.ipv4 = RangeTable(ranges[4])
+        self.ipv6 = RangeTable(ranges[6])
+
+    def __contains__(self, ip_str: str) -> bool:
+        address = address_to_int(ip_str)
+        if address is None:
+            return False
+        return self.contains(*address)
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(self.__class__.__name__, self.networks)
+
+    def contains(self, version: int, value: int) -> bool:
+        """
+        Returns true if the integer value of an IP address of the given
+        version belongs to any network in the index
+        """
+        if version == 4:
+            return value in self.ipv4
+        return value in self.ipv6
+
+
+__all__ = (
+    "address_to_int",
+    "parse_network",
+    "RangeTable",
+    "PrefixTable",
+    "NetworkIndex",
+)
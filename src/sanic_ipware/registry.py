@@ -0,0 +1,139 @@
+import typing as t
+
+from . import defaults as defs
+from .address import ParsedIP
+from .address import parse_ip
+from .ranges import NetworkIndex
+
+CATEGORIES = ("private", "loopback", "reserved", "internal")
+
+
+class AddressSpaceRegistry:
+    """Networks (in CIDR notation) that are not publicly routable, by
+    category: ``private``, ``loopback``, ``reserved`` and ``internal`` (for
+    corporate ranges that are public, but should never be taken as a client
+    address). Unless ``include_defaults`` is false, the private and loopback
+    networks of :mod:`sanic_ipware.defaults` are included, as well as the
+    reserved networks of the IANA special-purpose address registries.
+
+    Every category, and the union of all of them, is compiled once into a
+    sorted range index, so a lookup is a bisect no matter how many networks
+    were given. Registries are immutable: :meth:`extend` returns a new one.
+    Hand one to :class:`~sanic_ipware.ClientIPResolver` as ``address_space``
+    to have its addresses classified by it."""
+
+    __slots__ = ("networks", "_indexes", "_non_routable", "_loopback")
+
+    def __init__(
+        self,
+        private: t.Iterable[str] = (),
+        loopback: t.Iterable[str] = (),
+        reserved: t.Iterable[str] = (),
+        internal: t.Iterable[str] = (),
+        include_defaults: bool = True,
+    ) -> None:
+        networks = {
+            "private": tuple(private),
+            "loopback": tuple(loopback),
+            "reserved": tuple(reserved),
+            "internal": tuple(internal),
+        }
+        if include_defaults:
+            networks["private"] = (
+                defs.IPWARE_PRIVATE_IPV4_NETWORKS
+                + defs.IPWARE_PRIVATE_IPV6_NETWORKS
+                + networks["private"]
+            )
+            networks["loopback"] = (
+                defs.IPWARE_LOOPBACK_IPV4_NETWORKS
+                + defs.IPWARE_LOOPBACK_IPV6_NETWORKS
+                + networks["loopback"]
+            )
+            networks["reserved"] = (
+                defs.IPWARE_RESERVED_NETWORKS + networks["reserved"]
+            )
+        self.networks = networks
+        self._indexes = tuple(
+            (category, NetworkIndex(networks[category]))
+            for category in CATEGORIES
+        )
+        self._non_routable = NetworkIndex(
+            network
+            for category in CATEGORIES
+            for network in networks[category]
+        )
+        self._loopback = dict(self._indexes)["loopback"]
+
+    def __repr__(self) -> str:
+        return "{}({})".format(
+            self.__class__.__name__,
+            ", ".join(
+                "{}={!r}".format(category, self.networks[category])
+                for category in CATEGORIES
+            ),
+        )
+
+    def extend(self, **networks: t.Iterable[str]) -> "AddressSpaceRegistry":
+        """
+        Returns a new registry with the given networks (by category) added to
+        the ones in this registry
+        """
+        unknown = set(networks) - set(CATEGORIES)
+        if unknown:
+            raise ValueError(
+                "unknown categories: {}".format(", ".join(sorted(unknown)))
+            )
+        return self.__class__(
+            include_defaults=False,
+            **{
+                category: self.networks[category]
+                + tuple(networks.get(category, ()))
+                for category in CATEGORIES
+            }
+        )
+
+    def is_private(self, version: int, value: int) -> bool:
+        """
+        Returns true if the integer value of an IP address of the given
+        version belongs to any category, that is, it is not routable
+        """
+        return self._non_routable.contains(version, value)
+
+    def is_loopback(self, version: int, value: int) -> bool:
+        """
+        Returns true if the integer value of an IP address of the given
+        version belongs to the loopback category
+        """
+        return self._loopback.contains(version, value)
+
+    def flags(self, ip: t.Union[str, ParsedIP]) -> t.Tuple[bool, bool]:
+        """
+        Returns a tuple of (Private, Loopback) for a string or a ParsedIP,
+        just like the defaults would, but against this registry
+        """
+        if not isinstance(ip, ParsedIP):
+            ip = parse_ip(ip)
+            if ip is None:
+                return False, False
+        return (
+            self._non_routable.contains(ip.version, ip.value),
+            self._loopback.contains(ip.version, ip.value),
+        )
+
+    def categories(self, ip: t.Union[str, ParsedIP]) -> t.Tuple[str, ...]:
+        """
+        Returns the names of the categories an address (string or ParsedIP)
+        belongs to, in the order of `CATEGORIES`
+        """
+        if not isinstance(ip, ParsedIP):
+            ip = parse_ip(ip)
+            if ip is None:
+                return ()
+        return tuple(
+            category
+            for category, index in self._indexes
+            if index.contains(ip.version, ip.value)
+        )
+
+
+__all__ = ("CATEGORIES", "AddressSpaceRegistry")
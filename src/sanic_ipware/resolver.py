@@ -0,0 +1,477 @@
+import typing as t
+from functools import partial
+from itertools import repeat
+from time import perf_counter
+from types import MappingProxyType
+
+from . import defaults as defs
+from . import utils as util
+from .address import ParsedIP
+from .address import parse_ip
+from .cache import InternTable
+from .cache import LRUCache
+from .headers import HeaderParser
+from .headers import HeaderPlan
+from .headers import get_header_parser
+from .metrics import ResolverMetrics
+from .ranges import NetworkIndex
+from .registry import AddressSpaceRegistry
+
+PROXY_ORDERS = ("left-most", "right-most", "right-most-untrusted")
+
+
+def _parse_interned(
+    intern: t.Callable[[ParsedIP], str], ip_str: str
+) -> t.Optional[ParsedIP]:
+    ip = parse_ip(ip_str)
+    if ip is not None:
+        ip.ip = intern(ip)
+    return ip
+
+
+class ClientIPResolver:
+    """A compiled version of :func:`sanic_ipware.get_client_ip`. Every option
+    is normalized once, when the resolver is created (usually at application
+    startup), so :meth:`resolve` only has to deal with the request itself.
+
+    Given a ``cache_size``, parsed addresses are kept in a bounded LRU cache
+    (available as :attr:`ip_cache`) keyed by the raw address token. Given a
+    ``result_cache_size``, whole results are memoized as well (available as
+    :attr:`result_cache`), keyed by the tuple of raw header values consulted.
+    Given an ``intern_size``, addresses are spelled canonically (compressed
+    IPv6) and repeated ones share a single string object, kept in a bounded
+    :class:`~sanic_ipware.cache.InternTable` (available as
+    :attr:`intern_table`).
+    Headers longer than ``max_header_length`` characters or with more than
+    ``max_hops`` comma separated entries are skipped before any address in
+    them is looked at. Header values are picked out of the request with a
+    single :class:`~sanic_ipware.headers.HeaderPlan` pass and parsed as per
+    their grammar (see :func:`~sanic_ipware.headers.get_header_parser`),
+    which ``header_parsers`` can override by header name. Given an
+    ``address_space`` (an :class:`~sanic_ipware.AddressSpaceRegistry`),
+    addresses are classified by it instead of the defaults. Resolvers are
+    immutable (their options are read-only attributes): a different
+    configuration means a different resolver, with caches of its own.
+
+    With the ``right-most-untrusted`` proxy order, headers are expected to
+    list the client first (as with ``left-most``), but are walked from the
+    right: trusted proxies are skipped (at most ``proxy_count`` of them, if
+    given) and the first address that is not trusted is the client. No
+    header is refused for having more or fewer addresses than expected.
+
+    Given ``metrics`` (a :class:`~sanic_ipware.metrics.ResolverMetrics`),
+    every request resolved (with :meth:`resolve`, :meth:`resolve_headers`,
+    :meth:`resolve_many` or :meth:`resolve_columns`) is recorded in it: the
+    header the IP came from, fall-throughs, invalid tokens and timings (see
+    :meth:`snapshot`). Without it, all it costs is a single check."""
+
+    __slots__ = (
+        "_proxy_order",
+        "_proxy_count",
+        "_proxy_trusted_ips",
+        "_request_header_order",
+        "_header_parsers",
+        "_address_space",
+        "_ip_cache",
+        "_result_cache",
+        "_intern_table",
+        "_metrics",
+        "_parse_ip",
+        "_trusted_proxies",
+        "_right_most",
+        "_max_header_length",
+        "_max_hops",
+        "_scanners",
+        "_walkers",
+        "_positions",
+        "_header_plan",
+        "_flags",
+        "_min_ip_count",
+        "_max_ip_count",
+    )
+
+    def __init__(
+        self,
+        proxy_order: str = "left-most",
+        proxy_count: t.Optional[int] = None,
+        proxy_trusted_ips: t.Optional[t.Iterable[str]] = None,
+        request_header_order: t.Optional[t.Iterable[str]] = None,
+        cache_size: t.Optional[int] = None,
+        result_cache_size: t.Optional[int] = None,
+        max_header_length: t.Optional[int] = None,
+        max_hops: t.Optional[int] = None,
+        address_space: t.Optional[AddressSpaceRegistry] = None,
+        header_parsers: t.Optional[
+            t.Mapping[str, t.Union[str, HeaderParser]]
+        ] = None,
+        intern_size: t.Optional[int] = None,
+        metrics: t.Optional[ResolverMetrics] = None,
+    ) -> None:
+        if proxy_order not in PROXY_ORDERS:
+            raise ValueError(
+                "proxy_order must be one of {}, got {!r}".format(
+                    ", ".join(PROXY_ORDERS), proxy_order
+                )
+            )
+
+        if request_header_order is None:
+            request_header_order = defs.IPWARE_META_PRECEDENCE_ORDER
+
+        self._proxy_order = proxy_order
+        self._proxy_count = proxy_count
+        self._proxy_trusted_ips = tuple(proxy_trusted_ips or ())
+        self._trusted_proxies = NetworkIndex(self._proxy_trusted_ips)
+        self._request_header_order = tuple(request_header_order)
+
+        # every header is parsed according to its own grammar (a single
+        # address, a list, Forwarded or Via), picked here once and for all
+        self._header_parsers = dict(header_parsers or {})
+        parsers = [
+            get_header_parser(header, self._header_parsers)
+            for header in self._request_header_order
+        ]
+        self._scanners = tuple(parser.scan for parser in parsers)
+        if proxy_order == "right-most-untrusted":
+            self._walkers = tuple(parser.walk for parser in parsers)
+        else:
+            self._walkers = (None,) * len(parsers)
+        self._positions = tuple(range(len(parsers)))
+        self._header_plan = HeaderPlan(self._request_header_order)
+
+        # addresses are classified by the defaults (cached on each parsed
+        # address) unless a registry of networks is given
+        self._address_space = address_space
+        if address_space is not None:
+            self._flags = address_space.flags
+        else:
+            self._flags = None
+
+        # client IPs end up as keys of rate limiters and such, so every
+        # spelling of an address can be given the same, canonical string
+        if intern_size:
+            self._intern_table = InternTable(intern_size)
+            parse = partial(_parse_interned, self._intern_table.intern)
+        else:
+            self._intern_table = None
+            parse = parse_ip
+
+        # the same few thousand client and proxy addresses tend to account
+        # for most of the requests, so their parsing can be cached
+        if cache_size:
+            self._ip_cache = LRUCache(parse, cache_size)
+            self._parse_ip = self._ip_cache.lookup
+        else:
+            self._ip_cache = None
+            self._parse_ip = parse
+
+        # with metrics, what is resolved is how the IP was found as well, so
+        # results served from the cache are counted just the same
+        self._metrics = metrics
+        if metrics is not None:
+            resolve_values = self._explain_values
+        else:
+            resolve_values = self.resolve_values
+
+        # behind a load balancer, the very same header values (and chains)
+        # repeat constantly, making the whole resolution a single lookup
+        if result_cache_size:
+            self._result_cache = LRUCache(resolve_values, result_cache_size)
+        else:
+            self._result_cache = None
+
+        # `<client>, <proxy1>, <proxy2>` or `<proxy2>, <proxy1>, <client>`
+        self._right_most = proxy_order == "right-most"
+
+        # huge headers are refused upfront, so they can't be used to make us
+        # burn CPU cycles on purpose
+        self._max_header_length = max_header_length
+        self._max_hops = max_hops
+
+        # all the `proxy_count` and `proxy_trusted_ips` checks boil down to
+        # an acceptable range for the number of IP addresses in a header
+        min_ip_count, max_ip_count = 1, float("inf")
+        if proxy_count == 0:
+            # we are not expecting requests via any proxies
+            max_ip_count = 1
+        elif proxy_count is not None and proxy_count > 0:
+            # we are expecting requests via `proxy_count` number of proxies
+            min_ip_count = max_ip_count = proxy_count + 1
+        if self._proxy_trusted_ips:
+            # we are expecting requests via at least one trusted proxy
+            min_ip_count = max(min_ip_count, 2)
+        self._min_ip_count = min_ip_count
+        self._max_ip_count = max_ip_count
+
+    @property
+    def proxy_order(self) -> str:
+        return self._proxy_order
+
+    @property
+    def proxy_count(self) -> t.Optional[int]:
+        return self._proxy_count
+
+    @property
+    def proxy_trusted_ips(self) -> t.Tuple[str, ...]:
+        return self._proxy_trusted_ips
+
+    @property
+    def request_header_order(self) -> t.Tuple[str, ...]:
+        return self._request_header_order
+
+    @property
+    def header_parsers(
+        self,
+    ) -> t.Mapping[str, t.Union[str, HeaderParser]]:
+        return MappingProxyType(self._header_parsers)
+
+    @property
+    def address_space(self) -> t.Optional[AddressSpaceRegistry]:
+        return self._address_space
+
+    @property
+    def ip_cache(self) -> t.Optional[LRUCache]:
+        return self._ip_cache
+
+    @property
+    def result_cache(self) -> t.Optional[LRUCache]:
+        return self._result_cache
+
+    @property
+    def intern_table(self) -> t.Optional[InternTable]:
+        return self._intern_table
+
+    @property
+    def metrics(self) -> t.Optional[ResolverMetrics]:
+        return self._metrics
+
+    def __repr__(self) -> str:
+        return (
+            "{}(proxy_order={!r}, proxy_count={!r}, proxy_trusted_ips={!r}, "
+            "request_header_order={!r})".format(
+                self.__class__.__name__,
+                self._proxy_order,
+                self._proxy_count,
+                self._proxy_trusted_ips,
+                self._request_header_order,
+            )
+        )
+
+    def is_trusted_proxy(self, ip: t.Union[str, ParsedIP]) -> bool:
+        """
+        Returns true if ip belongs to any of the trusted proxy networks
+        """
+        if isinstance(ip, ParsedIP):
+            return self._trusted_proxies.contains(ip.version, ip.value)
+        return ip in self._trusted_proxies
+
+    def clear_cache(self) -> None:
+        """
+        Drops every cached address, result and interned string, if caching
+        (or interning) is enabled
+        """
+        if self._ip_cache is not None:
+            self._ip_cache.clear()
+        if self._result_cache is not None:
+            self._result_cache.clear()
+        if self._intern_table is not None:
+            self._intern_table.clear()
+
+    def snapshot(self) -> t.Dict[str, t.Any]:
+        """
+        Returns a plain dict of what this resolver has done so far: the
+        `metrics` snapshot (None without metrics) and the stats of each of
+        its `caches` (None for the disabled ones). See `metrics.samples` for
+        a Prometheus-like view of it
+        """
+        caches = {}
+        for name in ("ip_cache", "result_cache", "intern_table"):
+            cache = getattr(self, name)
+            caches[name] = None if cache is None else cache.stats()
+        return {
+            "metrics": (
+                None if self._metrics is None else self._metrics.snapshot()
+            ),
+            "caches": caches,
+        }
+
+    def resolve(self, request: object) -> t.Tuple[t.Optional[str], bool]:
+        """
+        Given a request, it returns a tuple of (IP, Routable).
+        """
+        return self.resolve_headers(request.headers)
+
+    def resolve_headers(
+        self, headers: t.Any
+    ) -> t.Tuple[t.Optional[str], bool]:
+        """
+        Given the headers of a request, it returns a tuple of (IP, Routable).
+        """
+        values = self._header_plan.values(headers)
+        if self._metrics is not None:
+            return self._observe_values(values)
+        if self._result_cache is not None:
+            return self._result_cache.lookup(values)
+        client_ip, routable, _, _, _ = self._explain_values(values)
+        return client_ip, routable
+
+    def resolve_many(
+        self, headers: t.Iterable[t.Any]
+    ) -> t.Iterator[t.Tuple[t.Optional[str], bool]]:
+        """
+        Given an iterable of request headers (any mapping, like plain dicts
+        read from access logs), it lazily yields a tuple of (IP, Routable)
+        for each of them. Every result goes through the caches of this
+        resolver, so a batch benefits from `cache_size` and
+        `result_cache_size` just like a stream of requests would
+        """
+        values_of = self._header_plan.values
+        if self._metrics is not None:
+            resolve = self._observe_values
+        elif self._result_cache is not None:
+            resolve = self._result_cache.lookup
+        else:
+            resolve = self.resolve_values
+        for item in headers:
+            yield resolve(values_of(item))
+
+    def resolve_columns(
+        self, columns: t.Mapping[str, t.Sequence[t.Optional[str]]]
+    ) -> t.Tuple[t.List[t.Optional[str]], t.List[bool]]:
+        """
+        Given a mapping of header names to equally long sequences of header
+        values (None for the rows without that header), it returns the
+        lists of IPs and Routable flags, one entry per row. Names are matched
+        case-insensitively and the ones not in `request_header_order` are
+        ignored
+        """
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("columns must all have the same length")
+        rows = lengths.pop() if lengths else 0
+        by_name = {name.lower(): column for name, column in columns.items()}
+        selected = [
+            by_name.get(name.lower(), repeat(None, rows))
+            for name in self._request_header_order
+        ]
+        if self._metrics is not None:
+            resolve = self._observe_values
+        elif self._result_cache is not None:
+            resolve = self._result_cache.lookup
+        else:
+            resolve = self.resolve_values
+        ips = []
+        routables = []
+        for values in zip(*selected):
+            ip, routable = resolve(values)
+            ips.append(ip)
+            routables.append(routable)
+        return ips, routables
+
+    def resolve_values(
+        self, values: t.Iterable[t.Optional[str]]
+    ) -> t.Tuple[t.Optional[str], bool]:
+        """
+        Given the values of the headers in `request_header_order` (None for
+        the missing ones), it returns a tuple of (IP, Routable).
+        """
+        client_ip, routable, _, _, _ = self._explain_values(values)
+        return client_ip, routable
+
+    def _observe_values(
+        self, values: t.Tuple[t.Optional[str], ...]
+    ) -> t.Tuple[t.Optional[str], bool]:
+        start = perf_counter()
+        if self._result_cache is not None:
+            explained = self._result_cache.lookup(values)
+        else:
+            explained = self._explain_values(values)
+        client_ip, routable, position, present, invalid = explained
+        if position is None:
+            header = None
+            fall_throughs = present
+        else:
+            header = self._request_header_order[position]
+            fall_throughs = present - 1
+        self._metrics.observe(
+            header, fall_throughs, invalid, perf_counter() - start
+        )
+        return client_ip, routable
+
+    def _explain_values(
+        self, values: t.Iterable[t.Optional[str]]
+    ) -> t.Tuple[t.Optional[str], bool, t.Optional[int], int, int]:
+        """
+        Given the values of the headers in `request_header_order`, it returns
+        a tuple of (IP, Routable, Position, Present, Invalid): the position
+        of the header the IP came from (None if there is no IP), how many
+        headers were looked at and how many of them had no usable address
+        """
+        best = None
+        client_ip = None
+        routable = False
+        winner = None
+        present = 0
+        invalid = 0
+        trusted = self._trusted_proxies if self._proxy_trusted_ips else None
+        flags = self._flags
+        right_most = self._right_most
+        parse = self._parse_ip
+        max_skip = self._proxy_count
+        max_length = self._max_header_length
+        max_hops = self._max_hops
+        min_ip_count = self._min_ip_count
+        max_ip_count = self._max_ip_count
+
+        for position, value, scan, walk in zip(
+            self._positions, values, self._scanners, self._walkers
+        ):
+            if not value:
+                continue
+            present += 1
+
+            if walk is not None:
+                # right-most untrusted: trusted proxies are skipped by the
+                # walk itself
+                client = walk(
+                    value, trusted, parse, max_skip, max_length, max_hops
+                )
+                if client is None:
+                    invalid += 1
+                    continue
+                best = util.get_best_ip(best, client, flags)
+            else:
+                first, last, ip_count = scan(value, max_length, max_hops)
+                if ip_count == 0:
+                    invalid += 1
+                    continue
+                if not min_ip_count <= ip_count <= max_ip_count:
+                    continue
+
+                first = parse(first)
+                last = first if ip_count == 1 else parse(last)
+                if first is None or last is None:
+                    invalid += 1
+                    continue
+
+                client, proxy = (last, first) if right_most else (first, last)
+                if trusted is not None:
+                    if not trusted.contains(proxy.version, proxy.value):
+                        continue
+                    best = client
+                else:
+                    best = util.get_best_ip(best, client, flags)
+
+            if best is client:
+                winner = position
+            client_ip = best.ip
+            if flags is None:
+                routable = not best.private
+            else:
+                routable = not flags(best)[0]
+            if routable:
+                break
+
+        return client_ip, routable, winner, present, invalid
+
+
+__all__ = ("PROXY_ORDERS", "ClientIPResolver")
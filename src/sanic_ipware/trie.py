@@ -1,64 +1,134 @@
 import re
+from bisect import bisect_left
 
 
 # took from https://gist.github.com/EricDuminil/8faabc2f3de82b24e5a371b6dc0fd1e0
 class Trie:  # noqa
     """Regexp::Trie in python. Creates a Trie out of a list of words. The trie
     can be exported to a Regexp pattern. The corresponding Regexp should match
-    much faster than a simple Regexp union."""
+    much faster than a simple Regexp union.
+
+    No node is ever stored: the words are kept as a set and, once sorted,
+    every node of the trie is a contiguous run of them sharing a prefix, with
+    its children found by bisection. The pattern is generated without
+    recursion and cached until another word is added."""
+
+    __slots__ = ("_words", "_pattern")
 
     def __init__(self):
-        self.data = {}
+        self._words = set()
+        self._pattern = None
 
     def add(self, word):
-        ref = self.data
-        for char in word:
-            ref[char] = char in ref and ref[char] or {}
-            ref = ref[char]
-        ref[""] = 1
+        if word not in self._words:
+            self._words.add(word)
+            self._pattern = None
+
+    def __len__(self):
+        return len(self._words)
+
+    @property
+    def data(self):
+        """
+        A fresh copy of the trie as nested dicts, rebuilt on every access (so
+        changing it does not change the trie); call `dump()` once instead of
+        reading this over and over
+        """
+        return self.dump()
 
     def dump(self):
-        return self.data
+        """
+        Returns the trie as nested dicts, one per character, with a "" key
+        marking the end of a word
+        """
+        root = {}
+        for word in self._words:
+            ref = root
+            for char in word:
+                ref = ref.setdefault(char, {})
+            ref[""] = 1
+        return root
 
     def quote(self, char):
         return re.escape(char)
 
-    def _pattern(self, pData):
-        data = pData
-        if "" in data and len(data.keys()) == 1:
-            return None
-
-        alt = []
-        cc = []
-        q = 0
-        for char in sorted(data.keys()):
-            if isinstance(data[char], dict):
-                try:
-                    recurse = self._pattern(data[char])
-                    alt.append(self.quote(char) + recurse)
-                except Exception:
-                    cc.append(self.quote(char))
-            else:
-                q = 1
-        cconly = not len(alt) > 0
+    def pattern(self):
+        if self._pattern is None:
+            self._pattern = self._build_pattern()
+        return self._pattern
+
+    def _build_pattern(self):
+        words = sorted(self._words)
+        quoted = {char: self.quote(char) for char in set("".join(words))}
+        # breadth first, every node is (first word, last word + 1, depth),
+        # so parents always come before their children
+        nodes = [(0, len(words), 0)]
+        children = [[]]
+        ends = [False]
+        patterns = [None]
+        for index, (lo, hi, depth) in enumerate(nodes):
+            if lo < hi and len(words[lo]) == depth:
+                ends[index] = True
+                lo += 1
+            while lo < hi:
+                word = words[lo]
+                char = word[depth]
+                if char == "\U0010ffff":
+                    next_lo = hi
+                else:
+                    next_lo = bisect_left(
+                        words, word[:depth] + chr(ord(char) + 1), lo, hi
+                    )
+                children[index].append((quoted[char], len(nodes)))
+                if next_lo - lo == 1:
+                    # a single word left, so just a chain of characters: its
+                    # pattern is known already and there is nothing to expand
+                    rest = depth + 1
+                    nodes.append((lo, lo, rest))
+                    children.append(())
+                    ends.append(True)
+                    patterns.append(
+                        "".join([quoted[c] for c in word[rest:]]) or None
+                    )
+                else:
+                    nodes.append((lo, next_lo, depth + 1))
+                    children.append([])
+                    ends.append(False)
+                    patterns.append(None)
+                lo = next_lo
+
+        # then backwards, so children are done before their parents
+        for index in range(len(nodes) - 1, -1, -1):
+            entries = children[index]
+            if not entries and ends[index]:
+                # the end of a word (and maybe a chain of characters before
+                # it), nothing else to build
+                continue
+
+            alt = []
+            cc = []
+            for char, child in entries:
+                child = patterns[child]
+                if child is None:
+                    cc.append(char)
+                else:
+                    alt.append(char + child)
+            cconly = not alt
 
-        if len(cc) > 0:
             if len(cc) == 1:
                 alt.append(cc[0])
-            else:
+            elif cc:
                 alt.append("[" + "".join(cc) + "]")
 
-        if len(alt) == 1:
-            result = alt[0]
-        else:
-            result = "(?:" + "|".join(alt) + ")"
-
-        if q:
-            if cconly:
-                result += "?"
+            if len(alt) == 1:
+                result = alt[0]
             else:
-                result = "(?:%s)?" % result
-        return result
+                result = "(?:" + "|".join(alt) + ")"
 
-    def pattern(self):
-        return self._pattern(self.dump())
+            if ends[index]:
+                if cconly:
+                    result += "?"
+                else:
+                    result = "(?:%s)?" % result
+            patterns[index] = result
+        return patterns[0]
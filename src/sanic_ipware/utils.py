@@ -1,34 +1,60 @@
+import re
 import socket
 
 from . import defaults as defs
+from .address import ParsedIP
+from .address import normalize_ip
+from .address import parse_ip
 
+# a comma followed by an empty token (nothing but whitespace up to the next
+# comma); both start with a literal, so the regex engine can skip ahead
+_HAS_EMPTY_TOKEN = re.compile(r",\s*,")
+_EMPTY_TOKEN = re.compile(r",\s*(?=,)")
 
-def is_valid_ipv4(ip_str):
+
+def ipv4_to_int(ip_str):
     """
-    Check the validity of an IPv4 address
+    Given an IPv4 address string, it returns its 32-bit integer value, or None
+    if it is not a valid IPv4 address
     """
     try:
-        socket.inet_pton(socket.AF_INET, ip_str)
+        packed = socket.inet_pton(socket.AF_INET, ip_str)
     except AttributeError:  # noqa
-        try:  # Fall-back on legacy API or False
-            socket.inet_aton(ip_str)
+        try:  # Fall-back on legacy API or None
+            packed = socket.inet_aton(ip_str)
         except (AttributeError, socket.error):
-            return False
-        return ip_str.count(".") == 3
-    except socket.error:
-        return False
-    return True
+            return None
+        if ip_str.count(".") != 3:
+            return None
+    except (socket.error, ValueError):
+        return None
+    return int.from_bytes(packed, "big")
+
+
+def is_valid_ipv4(ip_str):
+    """
+    Check the validity of an IPv4 address
+    """
+    return ipv4_to_int(ip_str) is not None
+
+
+def ipv6_to_int(ip_str):
+    """
+    Given an IPv6 address string, it returns its 128-bit integer value, or
+    None if it is not a valid IPv6 address
+    """
+    try:
+        packed = socket.inet_pton(socket.AF_INET6, ip_str)
+    except (socket.error, ValueError):
+        return None
+    return int.from_bytes(packed, "big")
 
 
 def is_valid_ipv6(ip_str):
     """
     Check the validity of an IPv6 address
     """
-    try:
-        socket.inet_pton(socket.AF_INET6, ip_str)
-    except socket.error:
-        return False
-    return True
+    return ipv6_to_int(ip_str) is not None
 
 
 def is_valid_ip(ip_str):
@@ -38,14 +64,55 @@ def is_valid_ip(ip_str):
     return is_valid_ipv4(ip_str) or is_valid_ipv6(ip_str)
 
 
+def _parse(ip_str):
+    ip = parse_ip(ip_str)
+    if ip is None and "/" in ip_str:
+        # a single host in network notation, like "::1/128"
+        ip = parse_ip(ip_str.partition("/")[0])
+    return ip
+
+
+def _classify(ip_str, ipv4_table, ipv6_table):
+    """
+    Returns true if the address string is in the table of its version. Plain
+    addresses are looked up by their integer value right away; anything else
+    (brackets, ports, zone IDs, network notation) is parsed first.
+    IPv4-mapped IPv6 addresses are classified as the IPv4 address they map
+    """
+    if ":" in ip_str:
+        value, table = ipv6_to_int(ip_str), ipv6_table
+        if value is not None and value >> 32 == 0xFFFF:
+            # ::ffff:a.b.c.d, as `parse_ip` does
+            value, table = value & 0xFFFFFFFF, ipv4_table
+    else:
+        value, table = ipv4_to_int(ip_str), ipv4_table
+    if value is None:
+        ip = _parse(ip_str)
+        if ip is None:
+            return False
+        value, table = ip.value, ipv4_table if ip.version == 4 else ipv6_table
+    return value in table
+
+
+def _flags(ip):
+    """
+    Returns a tuple of (Private, Loopback) for a string or a ParsedIP
+    """
+    if isinstance(ip, ParsedIP):
+        return ip.private, ip.loopback
+    return is_private_ip(ip), is_loopback_ip(ip)
+
+
 def is_private_ip(ip_str):
     """
     Returns true of ip_str is private & not routable, else return false
     """
-    if defs.IPWARE_IPV4_REGEX.match(ip_str) is not None:
-        return True
-    return ip_str.startswith(
-        defs.IPWARE_PRIVATE_IPV6_PREFIX + defs.IPWARE_LOOPBACK_PREFIX
+    if isinstance(ip_str, ParsedIP):
+        return ip_str.private
+    return _classify(
+        ip_str,
+        defs.IPWARE_NON_PUBLIC_IPV4_RANGES,
+        defs.IPWARE_NON_PUBLIC_IPV6_TABLE,
     )
 
 
@@ -60,7 +127,13 @@ def is_loopback_ip(ip_str):
     """
     Returns true of ip_str is public & routable, else return false
     """
-    return ip_str.startswith(defs.IPWARE_LOOPBACK_PREFIX)
+    if isinstance(ip_str, ParsedIP):
+        return ip_str.loopback
+    return _classify(
+        ip_str,
+        defs.IPWARE_LOOPBACK_IPV4_RANGES,
+        defs.IPWARE_LOOPBACK_IPV6_TABLE,
+    )
 
 
 def get_request_header(request, header):
@@ -74,10 +147,7 @@ def get_request_header(request, header):
     return value
 
 
-def get_ips_from_string(ip_str):
-    """
-    Given a string, it returns a list of one or more valid IP addresses
-    """
+def _split_ips(ip_str):
     ip_list = []
 
     for ip in ip_str.split(","):
@@ -85,43 +155,229 @@ def get_ips_from_string(ip_str):
         if clean_ip:
             ip_list.append(clean_ip)
 
+    return ip_list
+
+
+def get_ips_from_string(ip_str):
+    """
+    Given a string, it returns a list of one or more valid IP addresses,
+    without brackets, ports or zone IDs
+    """
+    ip_list = [normalize_ip(ip) for ip in _split_ips(ip_str)]
     ip_count = len(ip_list)
     if ip_count > 0:
-        if is_valid_ip(ip_list[0]) and is_valid_ip(ip_list[-1]):
+        if parse_ip(ip_list[0]) and parse_ip(ip_list[-1]):
             return ip_list, ip_count
 
     return [], 0
 
 
-def get_ip_info(ip_str):
+def scan_ips_from_string(ip_str, max_length=None, max_count=None):
     """
-    Given a string, it returns a tuple of (IP, Routable).
+    Given a string, it returns a tuple of (First, Last, Count) of the comma
+    separated values in it, or (None, None, 0) if there are none. Only the
+    first and last values are cleaned up (and no list is built), and strings
+    longer than max_length or with more than max_count entries (empty ones
+    included) are refused before anything else is done
     """
+    if max_length is not None and len(ip_str) > max_length:
+        return None, None, 0
+
+    separators = ip_str.count(",")
+    if separators == 0:
+        ip = ip_str.strip().lower()
+        if ip:
+            return ip, ip, 1
+        return None, None, 0
+
+    if max_count is not None and separators >= max_count:
+        return None, None, 0
+
+    first_end = ip_str.find(",")
+    last_start = ip_str.rfind(",") + 1
+    first = ip_str[:first_end].strip()
+    last = ip_str[last_start:].strip()
+    ip_count = separators + 1
+    if _HAS_EMPTY_TOKEN.search(ip_str) is not None:
+        ip_count -= len(_EMPTY_TOKEN.findall(ip_str))
+    if not first or not last:
+        # leading or trailing empty tokens, which are rare enough
+        ip_list = _split_ips(ip_str)
+        if not ip_list:
+            return None, None, 0
+        first, last, ip_count = ip_list[0], ip_list[-1], len(ip_list)
+
+    return first.lower(), last.lower(), ip_count
+
+
+def walk_ips_from_string(
+    ip_str,
+    trusted=None,
+    parse=parse_ip,
+    max_skip=None,
+    max_length=None,
+    max_count=None,
+):
+    """
+    Given a string of comma separated addresses (client first, closest proxy
+    last), it walks them from the right, skipping up to max_skip (or all)
+    addresses in trusted (anything with a `contains(version, value)` method,
+    like `ranges.NetworkIndex`), and returns the ParsedIP of the first one
+    that is not skipped: the right-most untrusted address, or the left-most
+    one if the whole chain is trusted. None is returned if there are no
+    addresses or an invalid one is found before that. No list is built: the
+    string is scanned backwards, one token at a time
+    """
+    if max_length is not None and len(ip_str) > max_length:
+        return None
+    if max_count is not None and ip_str.count(",") >= max_count:
+        return None
+
+    # with nothing trusted, the right-most address is the client
+    skip = 0 if trusted is None else -1 if max_skip is None else max_skip
+    contains = None if trusted is None else trusted.contains
+    rfind = ip_str.rfind
     ip = None
-    is_routable_ip = False
-    if is_valid_ip(ip_str):
-        ip = ip_str
-        is_routable_ip = is_public_ip(ip)
-    return ip, is_routable_ip
+    end = len(ip_str)
+    while end >= 0:
+        start = rfind(",", 0, end)
+        begin = start + 1
+        token = ip_str[begin:end].strip()
+        end = start
+        if token:
+            # lowercased one token at a time, not the whole header
+            ip = parse(token.lower())
+            if ip is None or skip == 0 or not contains(ip.version, ip.value):
+                return ip
+            skip -= 1
+    return ip
+
+
+def get_ip_info(ip_str):
+    """
+    Given a string (or a ParsedIP), it returns a tuple of (IP, Routable).
+    """
+    ip = ip_str if isinstance(ip_str, ParsedIP) else parse_ip(ip_str)
+    if ip is None:
+        return None, False
+    return ip.ip, not ip.private
 
 
-def get_best_ip(last_ip, next_ip):
+def get_best_ip(last_ip, next_ip, flags=None):
     """
-    Given two IP addresses, it returns the the best match ip.
-    Order of precedence is (Public, Private, Loopback, None)
-    Right-most IP is returned
+    Given two IP addresses (strings or ParsedIP), it returns the the best
+    match ip. Order of precedence is (Public, Private, Loopback, None)
+    Right-most IP is returned. A function returning (Private, Loopback) for
+    an address (like `AddressSpaceRegistry.flags`) may replace the defaults
     """
     if last_ip is None:
         return next_ip
-    if is_public_ip(last_ip) and not is_public_ip(next_ip):
+    if flags is None:
+        flags = _flags
+    last_private, _ = flags(last_ip)
+    next_private, next_loopback = flags(next_ip)
+    if not last_private and next_private:
         return last_ip
-    if is_private_ip(last_ip) and is_loopback_ip(next_ip):
+    if last_private and next_loopback:
         return last_ip
     return next_ip
 
 
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "numpy is required for array classification, install it with "
+            "`pip install sanic-ipware[numpy]`"
+        ) from None
+    return numpy
+
+
+def _range_arrays(np, table):
+    """
+    Returns the sorted (Starts, Ends) arrays of a RangeTable
+    """
+    starts, ends = zip(*table) if len(table) else ((), ())
+    return np.array(starts, dtype=np.uint32), np.array(ends, dtype=np.uint32)
+
+
+def _in_ranges(np, values, starts, ends):
+    """
+    Returns a boolean array telling which values fall in any of the ranges
+    """
+    index = np.searchsorted(starts, values, side="right") - 1
+    found = index >= 0
+    index[~found] = 0
+    return found & (values <= ends[index])
+
+
+def ipv4_array_to_int(addresses):
+    """
+    Given an array (or any sequence) of IPv4 address strings, it returns a
+    tuple of (Values, Valid): a uint32 array of their integer values (0 for
+    the invalid ones) and a boolean array telling which ones were valid
+    """
+    np = _import_numpy()
+    addresses = np.asarray(addresses)
+    if addresses.dtype.kind == "S":
+        addresses = np.char.decode(addresses, "ascii", "replace")
+    strings = [str(address) for address in addresses.ravel().tolist()]
+    try:
+        # logs are mostly made of valid addresses: pack them all at once and
+        # let numpy read the result as big endian integers
+        packed = b"".join(
+            [socket.inet_pton(socket.AF_INET, ip) for ip in strings]
+        )
+    except (socket.error, ValueError):
+        packed = None
+    if packed is not None:
+        values = np.frombuffer(packed, dtype=">u4").astype(np.uint32)
+        valid = np.ones(values.shape, dtype=bool)
+    else:
+        values = np.fromiter(
+            (
+                -1 if value is None else value
+                for value in map(ipv4_to_int, strings)
+            ),
+            dtype=np.int64,
+            count=len(strings),
+        )
+        valid = values >= 0
+        values = np.where(valid, values, 0).astype(np.uint32)
+    return (
+        values.reshape(addresses.shape),
+        valid.reshape(addresses.shape),
+    )
+
+
+def classify_ipv4_array(addresses):
+    """
+    Given an array of IPv4 addresses, either as uint32 integers or as
+    strings, it returns a tuple of (Private, Loopback, Public) boolean arrays
+    using the same ranges as `is_private_ip` and `is_loopback_ip`. Invalid
+    address strings are neither of them. Requires numpy
+    """
+    np = _import_numpy()
+    addresses = np.asarray(addresses)
+    if addresses.dtype.kind in "iu":
+        valid = (addresses >= 0) & (addresses <= 0xFFFFFFFF)
+        values = np.where(valid, addresses, 0).astype(np.uint32)
+    else:
+        values, valid = ipv4_array_to_int(addresses)
+    private = _in_ranges(
+        np, values, *_range_arrays(np, defs.IPWARE_NON_PUBLIC_IPV4_RANGES)
+    )
+    loopback = _in_ranges(
+        np, values, *_range_arrays(np, defs.IPWARE_LOOPBACK_IPV4_RANGES)
+    )
+    return private & valid, loopback & valid, ~private & valid
+
+
 __all__ = (
+    "ipv4_to_int",
     "is_valid_ipv4",
+    "ipv6_to_int",
     "is_valid_ipv6",
     "is_valid_ip",
     "is_private_ip",
@@ -129,6 +385,10 @@ __all__ = (
     "is_loopback_ip",
     "get_request_header",
     "get_ips_from_string",
+    "scan_ips_from_string",
+    "walk_ips_from_string",
     "get_ip_info",
     "get_best_ip",
+    "ipv4_array_to_int",
+    "classify_ipv4_array",
 )
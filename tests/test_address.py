@@ -0,0 +1,73 @@
+from sanic_ipware.address import ParsedIP
+from sanic_ipware.address import canonical_ip
+from sanic_ipware.address import normalize_ip
+from sanic_ipware.address import parse_ip
+
+
+def test_parse_ipv4():
+    ip = parse_ip("177.139.233.139")
+    assert isinstance(ip, ParsedIP)
+    assert ip.ip == "177.139.233.139"
+    assert ip.version == 4
+    assert ip.packed == bytes([177, 139, 233, 139])
+    assert ip.value == 0xB18BE98B
+    assert ip.public
+    assert not ip.private
+    assert not ip.loopback
+
+
+def test_parse_ipv6():
+    ip = parse_ip("::1")
+    assert ip.version == 6
+    assert ip.value == 1
+    assert ip.private
+    assert ip.loopback
+
+    ip = parse_ip("fd00::1")
+    assert ip.private
+    assert not ip.loopback
+
+
+def test_parse_invalid():
+    assert parse_ip("unknown") is None
+    assert parse_ip("177.139.233.139x") is None
+    assert parse_ip("3ffe:1900:4545:3:200:f8ff:fe21:67cz") is None
+    assert parse_ip("") is None
+
+
+def test_parsed_ip_equality():
+    assert parse_ip("fc00::1") == parse_ip("fc00:0::1")
+    assert parse_ip("10.0.0.1") != parse_ip("10.0.0.2")
+    assert len({parse_ip("::1"), parse_ip("0::1")}) == 1
+
+
+def test_normalize_ip():
+    assert normalize_ip("203.0.113.7") == "203.0.113.7"
+    assert normalize_ip("203.0.113.7:51234") == "203.0.113.7"
+    assert normalize_ip("[2001:db8::5]:443") == "2001:db8::5"
+    assert normalize_ip("[2001:db8::5]") == "2001:db8::5"
+    assert normalize_ip("fe80::1%eth0") == "fe80::1"
+    assert normalize_ip("[fe80::1%25eth0]:80") == "fe80::1"
+    assert normalize_ip("2001:db8::5") == "2001:db8::5"
+    assert normalize_ip("[2001:db8::5") == "[2001:db8::5"
+    assert normalize_ip("unknown") == "unknown"
+
+
+def test_parse_ip_normalized():
+    assert parse_ip("203.0.113.7:51234").ip == "203.0.113.7"
+    assert parse_ip("[2001:db8::5]:443").ip == "2001:db8::5"
+    assert parse_ip("fe80::1%eth0").ip == "fe80::1"
+
+    ip = parse_ip("::ffff:177.139.233.139")
+    assert (ip.ip, ip.version, ip.public) == ("177.139.233.139", 4, True)
+    ip = parse_ip("0:0:0:0:0:FFFF:b18b:e98b")
+    assert (ip.ip, ip.version, ip.public) == ("177.139.233.139", 4, True)
+    assert parse_ip("::ffff:127.0.0.1").loopback
+
+
+def test_canonical_ip():
+    assert canonical_ip(parse_ip("2001:0DB8:0000:0000::0001")) == "2001:db8::1"
+    assert canonical_ip(parse_ip("::FFFF:177.139.233.139")) == (
+        "177.139.233.139"
+    )
+    assert canonical_ip(parse_ip("177.139.233.139")) == "177.139.233.139"
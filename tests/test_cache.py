@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from sanic_ipware.address import parse_ip
+from sanic_ipware.cache import InternTable
+from sanic_ipware.cache import LRUCache
+
+
+def test_lru_cache_hits_and_misses():
+    calls = []
+
+    def double(value):
+        calls.append(value)
+        return value * 2
+
+    cache = LRUCache(double, maxsize=2)
+    assert cache(1) == 2
+    assert cache(1) == 2
+    assert cache(2) == 4
+    assert calls == [1, 2]
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+    cache(3)  # evicts 1, the least recently used
+    cache(1)
+    assert calls == [1, 2, 3, 1]
+    assert len(cache) == 2
+
+    stats = cache.stats()
+    assert stats["maxsize"] == 2
+    assert stats["hit_rate"] == 0.2
+
+
+def test_lru_cache_clear():
+    cache = LRUCache(str, maxsize=8)
+    cache(1)
+    cache(1)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 0
+
+
+def test_lru_cache_invalid_maxsize():
+    with pytest.raises(ValueError):
+        LRUCache(str, maxsize=0)
+    with pytest.raises(ValueError):
+        LRUCache(str, maxsize=None)
+
+
+def test_lru_cache_threads():
+    cache = LRUCache(str, maxsize=64)
+    errors = []
+
+    def worker():
+        try:
+            for value in range(1000):
+                assert cache(value % 100) == str(value % 100)
+        except AssertionError as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache) == 64
+    assert cache.hits + cache.misses == 8000
+
+
+def test_intern_table():
+    table = InternTable(maxsize=2)
+    first = table.intern(parse_ip("2001:DB8:0:0::1"))
+    assert first == "2001:db8::1"
+    assert table.intern(parse_ip("2001:db8::0:1")) is first
+    assert table.intern(parse_ip("[2001:db8::1]:443")) is first
+    assert (table.hits, table.misses, len(table)) == (2, 1, 1)
+
+    table.intern(parse_ip("177.139.233.139"))
+    table.intern(parse_ip("10.0.0.1"))  # evicts 2001:db8::1, the oldest
+    assert len(table) == 2
+    assert table.intern(parse_ip("2001:db8::1")) is not first
+
+    stats = table.stats()
+    assert stats["maxsize"] == 2
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+    assert stats["bytes"] == table.footprint() > 0
+
+    table.clear()
+    assert len(table) == 0
+    assert table.stats()["misses"] == 0
+    with pytest.raises(ValueError):
+        InternTable(maxsize=0)
@@ -0,0 +1,106 @@
+import io
+import json
+
+from sanic_ipware import cli
+
+COMBINED = (
+    '10.0.0.1 - - [10/Oct/2018:13:55:36 -0700] "GET / HTTP/1.1" 200 2326 '
+    '"-" "curl/7.61.0" "177.139.233.139, 198.84.193.157" "-"'
+)
+
+
+def test_parse_combined_line():
+    fields = ("X-Forwarded-For", "X-Real-IP")
+    assert cli.parse_combined_line(COMBINED, fields) == {
+        "X-Forwarded-For": "177.139.233.139, 198.84.193.157"
+    }
+    assert cli.parse_combined_line("not a log line", fields) == {}
+
+
+def test_parse_json_line():
+    fields = ()
+    headers = {"X-Real-IP": "177.139.233.139"}
+    assert cli.parse_json_line(json.dumps(headers), fields) == headers
+    line = json.dumps({"status": 200, "headers": headers})
+    assert cli.parse_json_line(line, fields) == headers
+    assert cli.parse_json_line("[1, 2]", fields) == {}
+    assert cli.parse_json_line("{", fields) == {}
+
+    # repeated headers logged as lists, numbers and nulls
+    line = json.dumps(
+        {
+            "X-Forwarded-For": ["177.139.233.139", "198.84.193.157", 1],
+            "X-Real-IP": None,
+            "Content-Length": 42,
+            "Via": [],
+        }
+    )
+    assert cli.parse_json_line(line, fields) == {
+        "X-Forwarded-For": "177.139.233.139, 198.84.193.157"
+    }
+
+
+def test_process():
+    lines = [
+        json.dumps({"X-Forwarded-For": "177.139.233.139, 198.84.193.157"}),
+        json.dumps({"X-Real-IP": "10.0.0.1"}),
+        "",
+    ]
+    output = io.StringIO()
+    config = {"IPWARE_PROXY_ORDER": "right-most"}
+    assert cli.process(lines, output, config, chunk_size=2) == 3
+    assert output.getvalue() == (
+        "198.84.193.157\ttrue\n10.0.0.1\tfalse\n-\tfalse\n"
+    )
+
+    # header values of other JSON types don't take the workers down
+    lines = [
+        json.dumps({"X-Forwarded-For": ["177.139.233.139", "10.0.0.1"]}),
+        json.dumps({"X-Forwarded-For": 42, "X-Real-IP": None}),
+    ] * 2
+    output = io.StringIO()
+    assert cli.process(lines, output, {}, workers=2, chunk_size=1) == 4
+    assert output.getvalue() == "177.139.233.139\ttrue\n-\tfalse\n" * 2
+
+
+class SlowOutput(io.StringIO):
+    """Checks how far the input is ahead of what was written so far."""
+
+    def __init__(self, read):
+        super().__init__()
+        self.read = read
+        self.written = 0
+        self.ahead = 0
+
+    def write(self, text):
+        self.ahead = max(self.ahead, self.read[0] - self.written)
+        self.written += text.count("\n")
+        return super().write(text)
+
+
+def test_process_bounded_read_ahead():
+    read = [0]
+
+    def lines():
+        for _ in range(200):
+            read[0] += 1
+            yield json.dumps({"X-Real-IP": "177.139.233.139"})
+
+    output = SlowOutput(read)
+    assert cli.process(lines(), output, {}, workers=2, chunk_size=5) == 200
+    assert output.written == 200
+    # never more than 2 * workers chunks of input ahead of the output
+    assert 0 < output.ahead <= 4 * 5
+
+
+def test_main(tmpdir, capsys):
+    source = tmpdir.join("access.log")
+    source.write("\n".join([COMBINED] * 5) + "\n")
+    target = tmpdir.join("client_ips.tsv")
+    argv = [str(source), "-o", str(target), "-f", "combined"]
+    assert cli.main(argv + ["-j", "2", "--chunk-size", "2"]) == 0
+    assert target.read() == "177.139.233.139\ttrue\n" * 5
+    assert "5 lines in" in capsys.readouterr().err
+
+    assert cli.main(argv + ["-j", "1", "--proxy-count", "2"]) == 0
+    assert target.read() == "-\tfalse\n" * 5
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+from sanic_ipware import defaults as defs
+from sanic_ipware.ranges import PrefixTable
+from sanic_ipware.ranges import RangeTable
+
+
+def test_tables_are_built_on_first_access():
+    statement = (
+        "import sys, sanic_ipware; "
+        "from sanic_ipware import defaults as defs; "
+        "assert 'IPWARE_IPV4_REGEX' not in vars(defs); "
+        "assert 'IPWARE_NON_PUBLIC_IPV4_RANGES' not in vars(defs); "
+        "assert sanic_ipware.utils.is_private_ip('10.0.0.1'); "
+        "assert 'IPWARE_NON_PUBLIC_IPV4_RANGES' in vars(defs); "
+        "assert 'IPWARE_IPV4_REGEX' not in vars(defs)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.check_call([sys.executable, "-c", statement], env=env)
+
+
+def test_lazy_defaults():
+    assert isinstance(defs.IPWARE_NON_PUBLIC_IPV4_RANGES, RangeTable)
+    assert isinstance(defs.IPWARE_NON_PUBLIC_IPV6_TABLE, PrefixTable)
+    assert defs.IPWARE_LOOPBACK_IPV6_TABLE is defs.IPWARE_LOOPBACK_IPV6_TABLE
+    assert defs.IPWARE_IPV4_REGEX.match("192.168.1.1")
+    assert not defs.IPWARE_IPV4_REGEX.match("177.139.233.139")
+
+    from sanic_ipware.defaults import IPWARE_IPV4_REGEX
+
+    assert IPWARE_IPV4_REGEX is defs.IPWARE_IPV4_REGEX
@@ -0,0 +1,75 @@
+import itertools
+
+from sanic import Sanic
+
+from sanic_ipware.extension import ClientIP
+from sanic_ipware.extension import IPware
+from sanic_ipware.extension import resolver_from_config
+
+_names = itertools.count()
+
+
+def _app(**config):
+    app = Sanic("test_sanic_ipware_{}".format(next(_names)))
+    app.config.update(config)
+    return app
+
+
+def _stored(request, attribute="client_ip"):
+    ctx = getattr(request, "ctx", None)
+    if ctx is not None:
+        return getattr(ctx, attribute)
+    return request[attribute]
+
+
+def test_resolver_from_config():
+    resolver = resolver_from_config(
+        {
+            "IPWARE_PROXY_ORDER": "right-most",
+            "IPWARE_PROXY_COUNT": "1",
+            "IPWARE_PROXY_TRUSTED_IPS": "10.0.0.0/8, 198.84.193.158",
+            "IPWARE_META_PRECEDENCE_ORDER": ["X-Real-IP"],
+            "IPWARE_CACHE_SIZE": 64,
+            "IPWARE_HEADER_PARSERS": "X-Real-IP=list, Via = single",
+        }
+    )
+    assert resolver.proxy_order == "right-most"
+    assert resolver.proxy_count == 1
+    assert resolver.proxy_trusted_ips == ("10.0.0.0/8", "198.84.193.158")
+    assert resolver.request_header_order == ("X-Real-IP",)
+    assert resolver.ip_cache.maxsize == 64
+    assert resolver.header_parsers == {"X-Real-IP": "list", "Via": "single"}
+    assert resolver_from_config({}).proxy_order == "left-most"
+
+
+def test_extension_registers_middleware():
+    app = _app(IPWARE_META_PRECEDENCE_ORDER=["X-Real-IP"])
+    ipware = IPware(app)
+    assert ipware.on_request in app.request_middleware
+    assert ipware.resolver.request_header_order == ("X-Real-IP",)
+
+
+def test_extension_lazy_client_ip(create_request):
+    ipware = IPware(_app())
+    request = create_request(
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157, 198.84.193.158"}
+    )
+    ipware.on_request(request)
+
+    client_ip = _stored(request)
+    assert isinstance(client_ip, ClientIP)
+    assert not client_ip.resolved
+    ip, routable = client_ip
+    assert client_ip.resolved
+    assert (ip, routable) == ("177.139.233.139", True)
+    assert client_ip.ip == "177.139.233.139"
+    assert client_ip.routable is True
+    assert client_ip == ("177.139.233.139", True)
+    assert ipware.client_ip(request) is client_ip
+
+
+def test_extension_client_ip_without_middleware(create_request):
+    ipware = IPware(_app(), attribute="ip")
+    request = create_request({"X-Real-IP": "10.0.0.1"})
+    assert ipware.client_ip(request) == ("10.0.0.1", False)
+    assert _stored(request, "ip") is ipware.client_ip(request)
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+
+import pytest
+from multidict import CIMultiDict
+
+from sanic_ipware import ClientIPResolver
+from sanic_ipware import utils as util
+from sanic_ipware.headers import HEADER_PARSERS
+from sanic_ipware.headers import HeaderParser
+from sanic_ipware.headers import HeaderPlan
+from sanic_ipware.headers import get_header_parser
+from sanic_ipware.headers import parse_forwarded
+from sanic_ipware.headers import parse_via
+from sanic_ipware.headers import scan_forwarded
+from sanic_ipware.headers import scan_single
+from sanic_ipware.headers import scan_via
+from sanic_ipware.headers import walk_forwarded
+from sanic_ipware.headers import walk_single
+from sanic_ipware.headers import walk_via
+from sanic_ipware.ranges import NetworkIndex
+
+
+def test_parse_forwarded():
+    value = (
+        'for=192.0.2.60;proto=http;by=203.0.113.43, for="[2001:db8::1]:4711"'
+    )
+    assert parse_forwarded(value) == ["192.0.2.60", "2001:db8::1"]
+    assert parse_forwarded('For="[2001:DB8:cafe::17]"') == [
+        "2001:db8:cafe::17"
+    ]
+    assert parse_forwarded("for=192.0.2.43:8080, for=unknown") == [
+        "192.0.2.43",
+        "unknown",
+    ]
+    assert parse_forwarded("proto=https;host=example.com") == []
+
+
+def test_parse_forwarded_quoted_strings():
+    value = 'for=192.0.2.43;by="_a;for=10.0.0.1, x", for="_hidden"'
+    assert parse_forwarded(value) == ["192.0.2.43", "_hidden"]
+    assert parse_forwarded('for="\\[2001:db8::1\\]"') == ["2001:db8::1"]
+    assert parse_forwarded('for="192.0.2.43') == []
+
+
+def test_scan_forwarded():
+    value = "for=177.139.233.139, for=198.84.193.157;proto=https"
+    assert scan_forwarded(value) == ("177.139.233.139", "198.84.193.157", 2)
+    assert scan_forwarded(value, max_count=1) == (None, None, 0)
+    assert scan_forwarded(value, max_length=10) == (None, None, 0)
+    assert scan_forwarded("proto=https") == (None, None, 0)
+
+
+def test_walk_forwarded():
+    trusted = NetworkIndex(["10.0.0.0/8"])
+    value = 'for=177.139.233.139, for="10.0.0.1:8080";proto=https'
+    assert walk_forwarded(value, trusted).ip == "177.139.233.139"
+    assert walk_forwarded(value, trusted, max_skip=0).ip == "10.0.0.1"
+    assert walk_forwarded("for=_hidden, for=10.0.0.1", trusted) is None
+    assert walk_forwarded(value, trusted, max_count=1) is None
+    assert walk_forwarded("proto=https", trusted) is None
+
+
+def test_parse_via():
+    value = "1.0 fred, 1.1 P.example.net (Apache/1.1, mod_proxy), 10.0.0.1"
+    assert parse_via(value) == ["fred", "p.example.net", "10.0.0.1"]
+    assert parse_via("HTTP/1.1 [2001:DB8::1]:8080, 1.1 198.84.193.157:80") == [
+        "2001:db8::1",
+        "198.84.193.157",
+    ]
+    assert scan_via("1.1 177.139.233.139, 1.1 10.0.0.1") == (
+        "177.139.233.139",
+        "10.0.0.1",
+        2,
+    )
+    trusted = NetworkIndex(["10.0.0.0/8"])
+    assert walk_via("1.1 177.139.233.139, 1.1 10.0.0.1", trusted).ip == (
+        "177.139.233.139"
+    )
+    assert walk_via("1.1 fred, 1.1 10.0.0.1", trusted) is None
+
+
+def test_single_value_headers():
+    assert scan_single(" 177.139.233.139 ") == (
+        "177.139.233.139",
+        "177.139.233.139",
+        1,
+    )
+    assert scan_single("  ") == (None, None, 0)
+    assert scan_single("177.139.233.139", max_length=5) == (None, None, 0)
+    # a list where a single address is expected is taken as a list
+    assert scan_single("177.139.233.139, 10.0.0.1") == (
+        "177.139.233.139",
+        "10.0.0.1",
+        2,
+    )
+    assert walk_single("2001:DB8::1").ip == "2001:db8::1"
+    assert walk_single("unknown") is None
+    trusted = NetworkIndex(["10.0.0.0/8"])
+    assert walk_single("177.139.233.139, 10.0.0.1", trusted).ip == (
+        "177.139.233.139"
+    )
+
+
+def test_get_header_parser():
+    assert get_header_parser("x-real-ip") is HEADER_PARSERS["single"]
+    assert get_header_parser("VIA") is HEADER_PARSERS["via"]
+    assert get_header_parser("X-Forwarded-For") is HEADER_PARSERS["list"]
+    assert get_header_parser("Forwarded").scan is scan_forwarded
+    assert get_header_parser("forwarded").walk is walk_forwarded
+    assert get_header_parser("X-Real-IP").walk is walk_single
+    parser = get_header_parser("X-Forwarded-For")
+    assert parser.scan is util.scan_ips_from_string
+    assert parser.walk is util.walk_ips_from_string
+    assert (
+        get_header_parser("X-Real-IP", {"x-real-ip": "list"})
+        is HEADER_PARSERS["list"]
+    )
+    custom = HeaderParser("custom", scan_single, walk_single)
+    assert get_header_parser("X-My-IP", {"X-My-IP": custom}) is custom
+    with pytest.raises(ValueError):
+        get_header_parser("X-Real-IP", {"X-Real-IP": "csv"})
+
+
+def test_header_plan_single_pass():
+    plan = HeaderPlan(["X-Forwarded-For", "X-Real-IP", "Forwarded"])
+    headers = CIMultiDict(
+        [
+            ("Host", "example.com"),
+            ("x-real-ip", "177.139.233.139"),
+            ("X-FORWARDED-FOR", "10.0.0.1"),
+            ("X-Forwarded-For", "10.0.0.2"),
+        ]
+    )
+    assert plan.values(headers) == ("10.0.0.1", "177.139.233.139", None)
+    assert plan.values({"X-REAL-IP": "177.139.233.139"}) == (
+        None,
+        "177.139.233.139",
+        None,
+    )
+    assert plan.values({}) == (None, None, None)
+    # blank values count as missing, like `utils.get_request_header` has it
+    assert plan.values(
+        {"X-Forwarded-For": "   ", "X-Real-IP": " 177.139.233.139 "}
+    ) == (None, "177.139.233.139", None)
+
+
+def test_header_plan_per_name_lookup():
+    plan = HeaderPlan(["X-Real-IP", "x-real-ip"], max_scan=1)
+    headers = CIMultiDict(
+        [("Host", "example.com"), ("X-Real-IP", "177.139.233.139")]
+    )
+    assert plan.values(headers) == ("177.139.233.139", "177.139.233.139")
+    assert plan.values(dict(headers)) == (
+        "177.139.233.139",
+        "177.139.233.139",
+    )
+
+    # other mappings are walked, whatever their size, as their `get` is
+    # case-sensitive
+    items = [("Host", "example.com"), ("x-real-ip", "177.139.233.139")]
+    headers = OrderedDict(items)
+    assert plan.values(headers) == ("177.139.233.139", "177.139.233.139")
+
+
+def test_resolver_ordered_dict_with_many_headers():
+    items = [("x-forwarded-for", "177.139.233.139")]
+    items += [("X-Extra-{}".format(i), "value") for i in range(10)]
+    resolver = ClientIPResolver()
+    assert resolver.resolve_headers(OrderedDict(items)) == (
+        "177.139.233.139",
+        True,
+    )
+    assert resolver.resolve_headers(CIMultiDict(items)) == (
+        "177.139.233.139",
+        True,
+    )
@@ -0,0 +1,118 @@
+import ipaddress
+
+from sanic_ipware import defaults as defs
+from sanic_ipware import utils as util
+from sanic_ipware.iana import BUNDLED_REGISTRY_PATH
+from sanic_ipware.iana import load_special_registry
+from sanic_ipware.iana import parse_special_registry
+from sanic_ipware.iana import reserved_networks
+
+HEADER = (
+    "Address Block,Name,RFC,Allocation Date,Termination Date,Source,"
+    "Destination,Forwardable,Globally Reachable,Reserved-by-Protocol"
+)
+
+REGISTRY = """# version: 2024-07
+{header}
+192.0.0.0/24 [2],IETF Protocol Assignments,[RFC6890],2010-01,N/A,False,False,False,False,False
+192.0.0.9/32,Port Control Protocol Anycast,[RFC7723],2015-10,N/A,True,True,True,True,False
+"192.0.0.170/32, 192.0.0.171/32",NAT64/DNS64 Discovery,[RFC8880],2013-02,N/A,False,False,False,False,True
+192.88.99.0/24,Deprecated (6to4 Relay Anycast),[RFC7526],2001-06,2015-03,,,,,
+
+{header}
+2001::/23,IETF Protocol Assignments,[RFC2928],2000-09,N/A,False [1],False [1],False [1],False [1],False
+2001:3::/32,AMT,[RFC7450],2014-12,N/A,True,True,True,True,False
+2002::/16 [3],6to4,[RFC3056],2001-02,N/A,True,True,True,N/A [3],False
+""".format(header=HEADER)
+
+
+def test_parse_special_registry():
+    version, blocks = parse_special_registry(REGISTRY.splitlines())
+    assert version == "2024-07"
+    assert [block.network for block in blocks] == [
+        "192.0.0.0/24",
+        "192.0.0.9/32",
+        "192.0.0.170/32",
+        "192.0.0.171/32",
+        "192.88.99.0/24",
+        "2001::/23",
+        "2001:3::/32",
+        "2002::/16",
+    ]
+    assert blocks[0].globally_reachable is False
+    assert blocks[1].globally_reachable is True
+    assert blocks[4].terminated and blocks[4].globally_reachable is None
+    assert blocks[-1].globally_reachable is None
+
+
+def test_reserved_networks():
+    _, blocks = parse_special_registry(REGISTRY.splitlines())
+    networks = reserved_networks(blocks)
+    assert "192.0.0.8/32" in networks
+    assert "192.0.0.9/32" not in networks
+    assert "192.0.0.10/31" in networks
+    assert "192.88.99.0/24" in networks
+    assert "2001:2::/32" in networks
+    assert "2001:3::/32" not in networks
+    assert not any(network.startswith("2002:") for network in networks)
+
+
+def test_reserved_networks_match_ipaddress():
+    # the carve-outs, done on integer ranges, give the very same networks
+    # as collapsing and excluding them with ipaddress
+    _, blocks = load_special_registry(BUNDLED_REGISTRY_PATH)
+    expected = []
+    for version in (4, 6):
+        reserved = []
+        reachable = []
+        for block in blocks:
+            network = ipaddress.ip_network(block.network, strict=False)
+            if network.version != version:
+                continue
+            if block.globally_reachable is False or (
+                block.terminated and block.globally_reachable is None
+            ):
+                reserved.append(network)
+            elif block.globally_reachable:
+                reachable.append(network)
+        networks = list(ipaddress.collapse_addresses(reserved))
+        for hole in reachable:
+            networks = [
+                piece
+                for network in networks
+                for piece in (
+                    [network]
+                    if not network.overlaps(hole)
+                    else (
+                        network.address_exclude(hole)
+                        if hole.prefixlen > network.prefixlen
+                        else []
+                    )
+                )
+            ]
+        expected.extend(
+            str(network) for network in ipaddress.collapse_addresses(networks)
+        )
+    assert reserved_networks(blocks) == expected
+
+
+def test_bundled_special_registry():
+    version, blocks = load_special_registry(BUNDLED_REGISTRY_PATH)
+    assert version is not None
+    assert defs.IPWARE_SPECIAL_REGISTRY == (version, blocks)
+    assert "192.88.99.0/24" in defs.IPWARE_RESERVED_IPV4_NETWORKS
+    assert "3fff::/20" in defs.IPWARE_RESERVED_IPV6_NETWORKS
+
+    for ip in ("192.88.99.1", "3fff::1", "5f00::1", "100::1", "2001:1::4"):
+        assert util.is_private_ip(ip)
+    for ip in ("2001:1::1", "2001:3::1", "2001:4860::8888", "2002::1"):
+        assert util.is_public_ip(ip)
+
+
+def test_special_registry_override(tmpdir, monkeypatch):
+    path = tmpdir.join("registry.csv")
+    path.write(REGISTRY)
+    monkeypatch.setenv("IPWARE_SPECIAL_REGISTRY", str(path))
+    version, blocks = load_special_registry()
+    assert version == "2024-07"
+    assert len(blocks) == 8
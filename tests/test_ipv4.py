@@ -253,3 +253,57 @@ def test_request_header_order_multiple(create_request):
         request, request_header_order=["Forwarded-For", "X-Forwarded-For"]
     )
     assert ip == ("177.139.233.138", True)
+
+
+def test_meta_proxy_trusted_ips_no_partial_match(create_request):
+    request = create_request(
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157, 110.0.0.12"}
+    )
+    result = get_client_ip(request, proxy_trusted_ips=["10.0.0.1"])
+    assert result == (None, False)
+
+
+def test_meta_proxy_trusted_ips_cidr(create_request):
+    request = create_request(
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157, 198.84.193.158"}
+    )
+    result = get_client_ip(request, proxy_trusted_ips=["198.84.192.0/22"])
+    assert result == ("177.139.233.139", True)
+
+
+def test_forwarded(create_request):
+    request = create_request(
+        {
+            "Forwarded": "for=177.139.233.139;proto=http;by=203.0.113.43, for=198.84.193.157",
+            "Via": "177.139.233.133",
+        }
+    )
+    result = get_client_ip(request)
+    assert result == ("177.139.233.139", True)
+
+
+def test_forwarded_obfuscated(create_request):
+    request = create_request(
+        {"Forwarded": "for=_hidden, for=198.84.193.157", "Via": "10.0.0.1"}
+    )
+    result = get_client_ip(request)
+    assert result == ("10.0.0.1", False)
+
+
+def test_meta_ports(create_request):
+    request = create_request(
+        {
+            "X-Forwarded-For": "177.139.233.139:51234, 198.84.193.157:443",
+            "X-Real-IP": "177.139.233.133",
+        }
+    )
+    result = get_client_ip(request)
+    assert result == ("177.139.233.139", True)
+
+
+def test_meta_ipv4_mapped(create_request):
+    request = create_request(
+        {"X-Forwarded-For": "::ffff:177.139.233.139, 198.84.193.157"}
+    )
+    result = get_client_ip(request)
+    assert result == ("177.139.233.139", True)
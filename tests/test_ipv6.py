@@ -202,3 +202,42 @@ def test_meta_proxy_trusted_ips_proxy_count_more_error_ignore_fallback(
         request, proxy_count=1, proxy_trusted_ips=["74dc::02bb"]
     )
     assert result == (None, False)
+
+
+def test_meta_proxy_trusted_ips_cidr(create_request):
+    request = create_request(
+        {
+            "X-Forwarded-For": "3ffe:1900:4545:3:200:f8ff:fe21:67cf, 74dc::02ba, 74dc::02bb"
+        }
+    )
+    result = get_client_ip(request, proxy_trusted_ips=["74dc::/16"])
+    assert result == ("3ffe:1900:4545:3:200:f8ff:fe21:67cf", True)
+
+
+def test_forwarded(create_request):
+    request = create_request(
+        {
+            "Forwarded": 'for="[3ffe:1900:4545:3:200:f8ff:fe21:67cf]:4711", for=unknown'
+        }
+    )
+    result = get_client_ip(request)
+    assert result == (None, False)
+
+    request = create_request(
+        {
+            "Forwarded": 'for="[3ffe:1900:4545:3:200:f8ff:fe21:67cf]:4711";proto=https'
+        }
+    )
+    result = get_client_ip(request)
+    assert result == ("3ffe:1900:4545:3:200:f8ff:fe21:67cf", True)
+
+
+def test_meta_brackets_ports_zones(create_request):
+    request = create_request(
+        {
+            "X-Forwarded-For": "[3ffe:1900:4545:3:200:f8ff:fe21:67cf]:443, fe80::1%eth0",
+            "X-Real-IP": "74dc::02ba",
+        }
+    )
+    result = get_client_ip(request)
+    assert result == ("3ffe:1900:4545:3:200:f8ff:fe21:67cf", True)
@@ -0,0 +1,172 @@
+import pytest
+
+from sanic_ipware import ClientIPResolver
+from sanic_ipware.metrics import ResolverMetrics
+from sanic_ipware.metrics import samples
+
+HEADERS = [
+    {"X-Forwarded-For": "177.139.233.139, 198.84.193.157"},
+    {"X-Forwarded-For": "10.0.0.1", "X-Real-IP": "177.139.233.133"},
+    {"X-Forwarded-For": "unknown, 10.0.0.1", "X-Real-IP": "10.0.0.2"},
+    {"X-Forwarded-For": "1.1.1.1, 177.139.233.139, 198.84.193.158"},
+    {"Forwarded": 'for="[2001:db8::1]:80", for=198.84.193.157'},
+    {"X-Real-IP": "127.0.0.1", "True-Client-IP": "10.0.0.3"},
+    {"X-Forwarded-For": " , ", "Via": "1.1 177.139.233.140"},
+    {"User-Agent": "curl/7.61.0"},
+]
+
+OPTIONS = [
+    {},
+    {"proxy_order": "right-most"},
+    {"proxy_count": 1},
+    {"proxy_trusted_ips": ["198.84.193.0/24"]},
+    {"proxy_order": "right-most-untrusted"},
+    {
+        "proxy_order": "right-most-untrusted",
+        "proxy_trusted_ips": ["198.84.193.0/24"],
+    },
+]
+
+
+def test_metrics_observe():
+    metrics = ResolverMetrics(buckets=[0.001, 0.0001])
+    assert metrics.buckets == (0.0001, 0.001)
+    metrics.observe("X-Real-IP", 1, 0, 0.00005)
+    metrics.observe("X-Real-IP", 0, 0, 0.0005)
+    metrics.observe(None, 2, 1, 0.5)
+    snapshot = metrics.snapshot()
+    assert snapshot["requests"] == 3
+    assert snapshot["unresolved"] == 1
+    assert snapshot["fall_throughs"] == 3
+    assert snapshot["invalid_tokens"] == 1
+    assert snapshot["header_wins"] == {"X-Real-IP": 2}
+    assert snapshot["duration"]["buckets"] == [
+        (0.0001, 1),
+        (0.001, 2),
+        (float("inf"), 3),
+    ]
+    assert snapshot["duration"]["count"] == 3
+    assert snapshot["duration"]["sum"] == pytest.approx(0.50055)
+
+    metrics.clear()
+    assert metrics.snapshot()["requests"] == 0
+    assert metrics.snapshot()["header_wins"] == {}
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_resolver_metrics_same_results(options):
+    plain = ClientIPResolver(**options)
+    observed = ClientIPResolver(metrics=ResolverMetrics(), **options)
+    cached = ClientIPResolver(
+        metrics=ResolverMetrics(), result_cache_size=16, **options
+    )
+    for headers in HEADERS:
+        expected = plain.resolve_headers(headers)
+        assert observed.resolve_headers(headers) == expected
+        assert cached.resolve_headers(headers) == expected
+    assert list(observed.resolve_many(HEADERS)) == list(
+        plain.resolve_many(HEADERS)
+    )
+    assert observed.metrics.requests == len(HEADERS) * 2
+
+
+def test_resolver_metrics():
+    resolver = ClientIPResolver(metrics=ResolverMetrics())
+    for headers in HEADERS:
+        resolver.resolve_headers(headers)
+    snapshot = resolver.snapshot()["metrics"]
+    assert snapshot["requests"] == 8
+    assert snapshot["unresolved"] == 1
+    assert snapshot["header_wins"] == {
+        "X-Forwarded-For": 2,
+        "X-Real-IP": 2,
+        "Forwarded": 1,
+        "True-Client-IP": 1,
+        "Via": 1,
+    }
+    # the private X-Forwarded-For of the 2nd request, the invalid one of the
+    # 3rd, the loopback X-Real-IP of the 6th and the empty X-Forwarded-For of
+    # the 7th; the private X-Real-IP of the 3rd is still the best there is
+    assert snapshot["fall_throughs"] == 4
+    # `unknown, ...` and ` , `
+    assert snapshot["invalid_tokens"] == 2
+    assert snapshot["duration"]["count"] == 8
+
+
+def test_resolver_metrics_blank_header():
+    resolver = ClientIPResolver(metrics=ResolverMetrics())
+    headers = {"X-Forwarded-For": "   ", "X-Real-IP": "177.139.233.133"}
+    assert resolver.resolve_headers(headers) == ("177.139.233.133", True)
+    assert resolver.resolve_headers({"X-Forwarded-For": "   "}) == (
+        None,
+        False,
+    )
+    snapshot = resolver.snapshot()["metrics"]
+    # a blank header is a missing one, neither passed over nor invalid
+    assert snapshot["fall_throughs"] == 0
+    assert snapshot["invalid_tokens"] == 0
+    assert snapshot["unresolved"] == 1
+
+
+def test_resolver_metrics_result_cache():
+    resolver = ClientIPResolver(
+        metrics=ResolverMetrics(), result_cache_size=16
+    )
+    headers = {"X-Forwarded-For": "10.0.0.1", "X-Real-IP": "177.139.233.133"}
+    for _ in range(3):
+        assert resolver.resolve_headers(headers) == ("177.139.233.133", True)
+    snapshot = resolver.snapshot()
+    # results served from the cache are counted just the same
+    assert snapshot["metrics"]["header_wins"] == {"X-Real-IP": 3}
+    assert snapshot["metrics"]["fall_throughs"] == 3
+    assert snapshot["caches"]["result_cache"]["hits"] == 2
+    assert snapshot["caches"]["ip_cache"] is None
+
+
+def test_resolver_metrics_resolve_columns():
+    resolver = ClientIPResolver(metrics=ResolverMetrics())
+    ips, _ = resolver.resolve_columns(
+        {"X-Real-IP": ["177.139.233.133", None], "Via": [None, "1.1 ::1"]}
+    )
+    assert ips == ["177.139.233.133", "::1"]
+    assert resolver.metrics.header_wins == {"X-Real-IP": 1, "Via": 1}
+
+
+def test_resolver_snapshot_without_metrics():
+    resolver = ClientIPResolver(cache_size=16)
+    resolver.resolve_headers({"X-Real-IP": "177.139.233.133"})
+    snapshot = resolver.snapshot()
+    assert snapshot["metrics"] is None
+    assert snapshot["caches"]["ip_cache"]["misses"] == 1
+    assert snapshot["caches"]["intern_table"] is None
+
+
+def test_samples():
+    resolver = ClientIPResolver(
+        metrics=ResolverMetrics(buckets=[1.0]), cache_size=16
+    )
+    resolver.resolve_headers({"X-Real-IP": "177.139.233.133"})
+    collected = {
+        (name, tuple(sorted(labels.items()))): value
+        for name, labels, value in samples(resolver.snapshot())
+    }
+    assert collected[("ipware_requests_total", ())] == 1
+    assert collected[("ipware_unresolved_total", ())] == 0
+    assert (
+        collected[("ipware_header_wins_total", (("header", "X-Real-IP"),))]
+        == 1
+    )
+    name = "ipware_resolve_duration_seconds_bucket"
+    assert collected[(name, (("le", "1.0"),))] == 1
+    assert collected[(name, (("le", "+Inf"),))] == 1
+    assert collected[("ipware_resolve_duration_seconds_count", ())] == 1
+    assert (
+        collected[("ipware_cache_misses_total", (("cache", "ip_cache"),))] == 1
+    )
+    assert ("ipware_cache_hits_total", (("cache", "result_cache"),)) not in (
+        collected
+    )
+
+    # no metrics, just the caches
+    names = {name for name, _, _ in samples(ClientIPResolver().snapshot())}
+    assert names == set()
@@ -0,0 +1,96 @@
+import pytest
+
+from sanic_ipware.ranges import NetworkIndex
+from sanic_ipware.ranges import PrefixTable
+from sanic_ipware.ranges import RangeTable
+from sanic_ipware.ranges import address_to_int
+from sanic_ipware.ranges import parse_network
+
+
+def test_address_to_int():
+    assert address_to_int("0.0.0.1") == (4, 1)
+    assert address_to_int("::1") == (6, 1)
+    assert address_to_int("unknown") is None
+
+
+def test_parse_network():
+    assert parse_network("10.0.0.0/8") == (4, 0x0A000000, 0x0AFFFFFF)
+    assert parse_network("10.1.2.3/8") == (4, 0x0A000000, 0x0AFFFFFF)
+    assert parse_network("::1") == (6, 1, 1)
+    assert parse_network(" 0.0.0.0/0 ") == (4, 0, 0xFFFFFFFF)
+    assert parse_network("2001:db8::1/32") == (
+        6,
+        0x20010DB8 << 96,
+        (0x20010DB8 << 96) + (1 << 96) - 1,
+    )
+    # netmasks are handed to ipaddress
+    assert parse_network("10.0.0.0/255.0.0.0") == (4, 0x0A000000, 0x0AFFFFFF)
+    for network in ("10.0.0.", "10.0.0.0/33", "::/129", "10.0.0.0/-1"):
+        with pytest.raises(ValueError):
+            parse_network(network)
+
+
+def test_range_table_merges():
+    table = RangeTable([(10, 20), (0, 5), (15, 30), (6, 8), (40, 40)])
+    assert list(table) == [(0, 8), (10, 30), (40, 40)]
+    assert 0 in table
+    assert 9 not in table
+    assert 30 in table
+    assert 31 not in table
+    assert 40 in table
+    assert 41 not in table
+    assert 0 not in RangeTable()
+
+
+def test_network_index():
+    index = NetworkIndex(["10.0.0.1", "192.168.0.0/16", "2001:db8::/32"])
+    assert "10.0.0.1" in index
+    assert "110.0.0.12" not in index
+    assert "10.0.0.12" not in index
+    assert "192.168.255.255" in index
+    assert "192.169.0.0" not in index
+    assert "2001:DB8:0::1" in index
+    assert "2001:db9::1" not in index
+    assert "unknown" not in index
+
+
+def test_prefix_table():
+    table = PrefixTable.from_networks(["fc00::/7", "fe80::/10", "::1/128"])
+    assert len(table) == 3
+    assert address_to_int("fd00::1")[1] in table
+    assert address_to_int("febf:ffff::")[1] in table
+    assert address_to_int("fec0::")[1] not in table
+    assert 1 in table
+    assert 0 not in table
+    with pytest.raises(ValueError):
+        PrefixTable.from_networks(["10.0.0.0/8"])
+
+    table = PrefixTable.from_networks(["10.0.0.0/8"], version=4)
+    assert 0x0A0B0C0D in table
+    assert 0x0B000000 not in table
+
+
+def test_prefix_table_many_prefix_lengths():
+    # 2001:1::/32 less 2001:1::1 leaves one network of every prefix length
+    # from /33 to /128 under the same 16 bits
+    networks = [
+        "2001:1::/128",
+        "2001:1::2/127",
+        "2001:1::4/126",
+        "2001:1:8000::/33",
+        "2001:1:4000::/34",
+        "2001:1:2000::/35",
+        "2001:1:1000::/36",
+        "2001:1:800::/37",
+        "2001:1:400::/38",
+        "2001:1:200::/39",
+    ]
+    table = PrefixTable.from_networks(networks)
+    assert len(table) == len(networks)
+    assert 0x20010001000000000000000000000000 in table
+    assert 0x20010001000000000000000000000001 not in table
+    assert 0x20010001000000000000000000000003 in table
+    assert 0x20010001000000000000000000000008 not in table
+    assert 0x20010001A00000000000000000000000 in table
+    assert 0x20010001010000000000000000000000 not in table
+    assert 0x20020001000000000000000000000000 not in table
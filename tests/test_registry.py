@@ -0,0 +1,72 @@
+import pytest
+
+from sanic_ipware import AddressSpaceRegistry
+from sanic_ipware import ClientIPResolver
+from sanic_ipware import utils as util
+from sanic_ipware.address import parse_ip
+
+
+def test_registry_defaults():
+    registry = AddressSpaceRegistry()
+    for ip in ("10.0.0.1", "127.0.0.1", "177.139.233.139", "fd00::1", "::1"):
+        assert registry.flags(ip) == (
+            util.is_private_ip(ip),
+            util.is_loopback_ip(ip),
+        )
+    assert registry.flags("not an ip") == (False, False)
+    assert registry.categories("127.0.0.1") == ("loopback", "reserved")
+    assert registry.categories("192.88.99.1") == ("reserved",)
+    assert registry.categories("177.139.233.139") == ()
+    assert AddressSpaceRegistry(include_defaults=False).flags("10.0.0.1") == (
+        False,
+        False,
+    )
+
+
+def test_registry_categories():
+    registry = AddressSpaceRegistry(
+        internal=["198.84.192.0/22", "2001:4860::/32"],
+        reserved=["240.0.0.0/4"],
+    )
+    assert registry.categories("198.84.193.157") == ("internal",)
+    assert registry.categories(parse_ip("2001:4860::8888")) == ("internal",)
+    assert registry.categories("250.1.2.3") == ("private", "reserved")
+    ip = parse_ip("198.84.193.157")
+    assert registry.is_private(ip.version, ip.value)
+    assert not registry.is_loopback(ip.version, ip.value)
+
+    extended = registry.extend(loopback=["177.139.233.0/24"])
+    assert extended.flags("177.139.233.139") == (True, True)
+    assert registry.flags("177.139.233.139") == (False, False)
+    assert extended.networks["internal"] == registry.networks["internal"]
+    with pytest.raises(ValueError):
+        registry.extend(public=["1.1.1.1"])
+    with pytest.raises(ValueError):
+        AddressSpaceRegistry(internal=["not a network"])
+
+
+def test_registry_many_networks():
+    networks = ["11.{}.{}.0/24".format(i // 256, i % 256) for i in range(4096)]
+    registry = AddressSpaceRegistry(internal=networks)
+    assert registry.categories("11.15.255.1") == ("internal",)
+    assert registry.categories("11.16.0.1") == ()
+
+
+def test_resolver_address_space(create_request):
+    request = create_request(
+        {
+            "X-Forwarded-For": "198.84.193.157, 177.139.233.139",
+            "X-Real-IP": "177.139.233.138",
+        }
+    )
+    registry = AddressSpaceRegistry(internal=["198.84.192.0/22"])
+    assert ClientIPResolver().resolve(request) == ("198.84.193.157", True)
+    resolver = ClientIPResolver(address_space=registry)
+    assert resolver.resolve(request) == ("177.139.233.138", True)
+
+    request = create_request({"X-Forwarded-For": "198.84.193.157, 10.0.0.1"})
+    assert resolver.resolve(request) == ("198.84.193.157", False)
+    trusted = ClientIPResolver(
+        proxy_trusted_ips=["10.0.0.0/8"], address_space=registry
+    )
+    assert trusted.resolve(request) == ("198.84.193.157", False)
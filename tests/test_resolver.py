@@ -0,0 +1,293 @@
+import pytest
+
+from sanic_ipware import ClientIPResolver
+from sanic_ipware import get_client_ip
+from sanic_ipware import get_client_ips
+
+
+def test_resolver_matches_get_client_ip(create_request):
+    request = create_request(
+        {
+            "X-Forwarded-For": "10.0.0.0, 10.0.0.1, 10.0.0.2",
+            "X-Cluster-Client-IP": "177.139.233.138, 198.84.193.157, 198.84.193.158",
+            "True-Client-IP": "177.139.233.133",
+        }
+    )
+    resolver = ClientIPResolver()
+    assert resolver.resolve(request) == get_client_ip(request)
+    assert resolver.resolve(request) == ("177.139.233.138", True)
+
+
+def test_resolver_right_most(create_request):
+    request = create_request(
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157, 198.84.193.158"}
+    )
+    resolver = ClientIPResolver(proxy_order="right-most")
+    assert resolver.resolve(request) == ("198.84.193.158", True)
+
+
+def test_resolver_right_most_untrusted(create_request):
+    request = create_request(
+        {
+            "X-Forwarded-For": (
+                "1.1.1.1, 177.139.233.139, 198.84.193.157, 198.84.193.158"
+            )
+        }
+    )
+    resolver = ClientIPResolver(
+        proxy_order="right-most-untrusted",
+        proxy_trusted_ips=["198.84.193.0/24"],
+    )
+    assert resolver.resolve(request) == ("177.139.233.139", True)
+
+    # no more than `proxy_count` trusted hops are skipped
+    resolver = ClientIPResolver(
+        proxy_order="right-most-untrusted",
+        proxy_count=1,
+        proxy_trusted_ips=["198.84.193.0/24"],
+    )
+    assert resolver.resolve(request) == ("198.84.193.157", True)
+
+    # a private client is not routable, so the next header is looked at
+    request = create_request(
+        {
+            "X-Forwarded-For": "177.139.233.139, 10.0.0.1, 198.84.193.158",
+            "X-Real-IP": "177.139.233.133",
+        }
+    )
+    resolver = ClientIPResolver(
+        proxy_order="right-most-untrusted",
+        proxy_trusted_ips=["198.84.193.0/24"],
+    )
+    assert resolver.resolve(request) == ("177.139.233.133", True)
+    assert resolver.resolve(
+        create_request({"X-Forwarded-For": "198.84.193.157"})
+    ) == ("198.84.193.157", True)
+
+
+def test_resolver_header_parsers(create_request):
+    request = create_request(
+        {"Via": "1.1 177.139.233.139, 1.0 fred", "X-Real-IP": " 10.0.0.1 "}
+    )
+    resolver = ClientIPResolver(request_header_order=["X-Real-IP", "Via"])
+    assert resolver.resolve(request) == ("10.0.0.1", False)
+
+    request = create_request(
+        {"Via": "1.1 177.139.233.139, 1.0 10.0.0.2", "X-Real-IP": "10.0.0.1"}
+    )
+    assert resolver.resolve(request) == ("177.139.233.139", True)
+
+    # Via as a plain list, as it used to be parsed
+    resolver = ClientIPResolver(
+        request_header_order=["X-Real-IP", "Via"],
+        header_parsers={"via": "list"},
+    )
+    assert resolver.header_parsers == {"via": "list"}
+    assert resolver.resolve(request) == ("10.0.0.1", False)
+
+    with pytest.raises(ValueError):
+        ClientIPResolver(header_parsers={"Via": "csv"})
+
+
+def test_resolver_intern_table():
+    resolver = ClientIPResolver(intern_size=16, cache_size=16)
+    first, _ = resolver.resolve_headers(
+        {"X-Forwarded-For": "2001:4860:0:0::8888, 10.0.0.1"}
+    )
+    second, _ = resolver.resolve_headers({"X-Real-IP": "2001:4860::8888"})
+    assert first == "2001:4860::8888"
+    assert second is first
+    assert resolver.intern_table.stats()["hits"] == 1
+
+    resolver.clear_cache()
+    assert len(resolver.intern_table) == 0
+    assert ClientIPResolver().intern_table is None
+
+
+def test_resolver_is_reusable(create_request):
+    resolver = ClientIPResolver(
+        proxy_count=1, request_header_order=["X-Real-IP", "X-Forwarded-For"]
+    )
+    first = create_request({"X-Forwarded-For": "177.139.233.139, 10.0.0.1"})
+    second = create_request({"X-Forwarded-For": "177.139.233.139"})
+    assert resolver.resolve(first) == ("177.139.233.139", True)
+    assert resolver.resolve(second) == (None, False)
+    assert resolver.request_header_order == ("X-Real-IP", "X-Forwarded-For")
+
+
+def test_resolver_is_immutable():
+    resolver = ClientIPResolver(
+        result_cache_size=16, header_parsers={"X-My-IP": "single"}
+    )
+    headers = {"X-Forwarded-For": "177.139.233.139, 198.84.193.157"}
+    assert resolver.resolve_headers(headers) == ("177.139.233.139", True)
+    for name, value in (
+        ("proxy_order", "right-most"),
+        ("proxy_count", 0),
+        ("proxy_trusted_ips", ("198.84.193.157",)),
+        ("request_header_order", ("X-Real-IP",)),
+        ("header_parsers", {}),
+        ("address_space", None),
+        ("ip_cache", None),
+        ("result_cache", None),
+        ("intern_table", None),
+        ("metrics", None),
+    ):
+        with pytest.raises(AttributeError):
+            setattr(resolver, name, value)
+    with pytest.raises(TypeError):
+        resolver.header_parsers["X-My-IP"] = "list"
+    assert resolver.header_parsers == {"X-My-IP": "single"}
+    assert resolver.resolve_headers(headers) == ("177.139.233.139", True)
+
+
+def test_resolver_invalid_proxy_order():
+    with pytest.raises(ValueError):
+        ClientIPResolver(proxy_order="middle-most")
+
+
+def test_resolver_ip_cache(create_request):
+    resolver = ClientIPResolver(cache_size=16)
+    request = create_request(
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157, 198.84.193.158"}
+    )
+    assert resolver.resolve(request) == ("177.139.233.139", True)
+    assert resolver.resolve(request) == ("177.139.233.139", True)
+    assert resolver.ip_cache.misses == 2
+    assert resolver.ip_cache.hits == 2
+
+    resolver.ip_cache.clear()
+    assert len(resolver.ip_cache) == 0
+    assert ClientIPResolver().ip_cache is None
+
+
+def test_resolver_result_cache(create_request):
+    resolver = ClientIPResolver(result_cache_size=2)
+    headers = {"X-Forwarded-For": "10.0.0.1", "X-Real-IP": "177.139.233.139"}
+    assert resolver.resolve(create_request(headers)) == (
+        "177.139.233.139",
+        True,
+    )
+    assert resolver.resolve(create_request(headers)) == (
+        "177.139.233.139",
+        True,
+    )
+    assert resolver.result_cache.stats()["hits"] == 1
+
+    other = create_request({"X-Real-IP": "10.0.0.1"})
+    assert resolver.resolve(other) == ("10.0.0.1", False)
+    assert len(resolver.result_cache) == 2
+
+    resolver.clear_cache()
+    assert len(resolver.result_cache) == 0
+
+
+def test_get_client_ip_result_cache(create_request):
+    request = create_request(
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157, 198.84.193.158"}
+    )
+    left = get_client_ip(request, result_cache_size=8)
+    right = get_client_ip(
+        request, proxy_order="right-most", result_cache_size=8
+    )
+    assert left == ("177.139.233.139", True)
+    assert right == ("198.84.193.158", True)
+
+
+def test_get_client_ip_trusted_list_identity(create_request):
+    from sanic_ipware import ipware
+
+    request = create_request(
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157"}
+    )
+    trusted = ["198.84.193.0/24"]
+    assert get_client_ip(request, proxy_trusted_ips=trusted)[0] == (
+        "177.139.233.139"
+    )
+    resolvers = {entry[2] for entry in ipware._RESOLVERS_BY_IDENTITY.values()}
+    assert get_client_ip(request, proxy_trusted_ips=trusted)[0] == (
+        "177.139.233.139"
+    )
+    # the same list object finds the same resolver
+    assert {
+        entry[2] for entry in ipware._RESOLVERS_BY_IDENTITY.values()
+    } == resolvers
+
+    # a list of another length is compiled again
+    trusted.append("10.0.0.0/8")
+    request = create_request({"X-Forwarded-For": "177.139.233.139, 10.0.0.1"})
+    assert get_client_ip(request, proxy_trusted_ips=trusted)[0] == (
+        "177.139.233.139"
+    )
+    assert get_client_ip(request, proxy_trusted_ips=["198.84.193.0/24"]) == (
+        None,
+        False,
+    )
+
+
+def test_resolver_max_hops(create_request):
+    request = create_request(
+        {
+            "X-Forwarded-For": "177.139.233.139, 198.84.193.157, 198.84.193.158",
+            "X-Real-IP": "177.139.233.138",
+        }
+    )
+    assert ClientIPResolver(max_hops=3).resolve(request) == (
+        "177.139.233.139",
+        True,
+    )
+    assert ClientIPResolver(max_hops=2).resolve(request) == (
+        "177.139.233.138",
+        True,
+    )
+    assert ClientIPResolver(max_header_length=20).resolve(request) == (
+        "177.139.233.138",
+        True,
+    )
+
+
+def test_resolver_resolve_many():
+    resolver = ClientIPResolver(cache_size=16)
+    results = resolver.resolve_many(
+        [
+            {"x-forwarded-for": "177.139.233.139, 198.84.193.157"},
+            {"X-Real-IP": "10.0.0.1"},
+            {},
+            {"X-Forwarded-For": "177.139.233.139, 198.84.193.158"},
+        ]
+    )
+    assert list(results) == [
+        ("177.139.233.139", True),
+        ("10.0.0.1", False),
+        (None, False),
+        ("177.139.233.139", True),
+    ]
+    assert resolver.ip_cache.hits == 1
+
+
+def test_get_client_ips():
+    headers = [
+        {"X-Forwarded-For": "177.139.233.139, 198.84.193.157"},
+        {"X-Forwarded-For": "177.139.233.138, 198.84.193.157"},
+    ]
+    assert list(get_client_ips(headers, proxy_order="right-most")) == [
+        ("198.84.193.157", True),
+        ("198.84.193.157", True),
+    ]
+
+
+def test_resolver_resolve_columns():
+    resolver = ClientIPResolver(result_cache_size=8)
+    ips, routables = resolver.resolve_columns(
+        {
+            "X-FORWARDED-FOR": [None, "10.0.0.1", "177.139.233.139"],
+            "X-Real-IP": ["177.139.233.138", None, "177.139.233.137"],
+            "User-Agent": ["curl", "curl", "curl"],
+        }
+    )
+    assert ips == ["177.139.233.138", "10.0.0.1", "177.139.233.139"]
+    assert routables == [True, False, True]
+    assert resolver.resolve_columns({}) == ([], [])
+
+    with pytest.raises(ValueError):
+        resolver.resolve_columns({"X-Real-IP": ["10.0.0.1"], "Via": []})
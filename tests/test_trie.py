@@ -0,0 +1,80 @@
+import random
+import re
+
+from sanic_ipware import defaults as defs
+from sanic_ipware.trie import Trie
+
+
+def _reference_pattern(data):
+    # the original, recursive, implementation
+    if "" in data and len(data.keys()) == 1:
+        return None
+    alt = []
+    cc = []
+    q = 0
+    for char in sorted(data.keys()):
+        if isinstance(data[char], dict):
+            recurse = _reference_pattern(data[char])
+            if recurse is None:
+                cc.append(re.escape(char))
+            else:
+                alt.append(re.escape(char) + recurse)
+        else:
+            q = 1
+    cconly = not len(alt) > 0
+    if len(cc) > 0:
+        if len(cc) == 1:
+            alt.append(cc[0])
+        else:
+            alt.append("[" + "".join(cc) + "]")
+    if len(alt) == 1:
+        result = alt[0]
+    else:
+        result = "(?:" + "|".join(alt) + ")"
+    if q:
+        if cconly:
+            result += "?"
+        else:
+            result = "(?:%s)?" % result
+    return result
+
+
+def _trie(words):
+    trie = Trie()
+    for word in words:
+        trie.add(word)
+    return trie
+
+
+def test_trie_pattern_is_unchanged():
+    rng = random.Random(7)
+    word_lists = [
+        defs.IPWARE_PRIVATE_IPV4_PREFIX + defs.IPWARE_LOOPBACK_IPV4_PREFIX,
+        defs.IPWARE_PRIVATE_IPV6_PREFIX,
+        ["", "a", "ab", "abc", "b", "b.d", "\U0010ffff", "\U0010ffffa"],
+        [],
+        [
+            "".join(
+                rng.choice("0123456789.:af")
+                for _ in range(rng.randrange(1, 9))
+            )
+            for _ in range(500)
+        ],
+    ]
+    for words in word_lists:
+        trie = _trie(words)
+        assert trie.pattern() == _reference_pattern(trie.dump())
+
+
+def test_trie_dump_and_cache():
+    trie = _trie(["10.", "100.64.", "10."])
+    assert len(trie) == 2
+    assert trie.dump() == {
+        "1": {"0": {".": {"": 1}, "0": {".": {"6": {"4": {".": {"": 1}}}}}}}
+    }
+    pattern = trie.pattern()
+    assert trie.pattern() is pattern
+    trie.add("10.")
+    assert trie.pattern() is pattern
+    trie.add("127.")
+    assert trie.pattern() == "1(?:0(?:0\\.64\\.|\\.)|27\\.)"
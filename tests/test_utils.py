@@ -1,4 +1,8 @@
+import pytest
+
 from sanic_ipware import utils as util
+from sanic_ipware.address import parse_ip
+from sanic_ipware.ranges import NetworkIndex
 
 
 def test_is_valid_ip():
@@ -53,6 +57,22 @@ def test_is_loopback_ip():
     assert util.is_loopback_ip(ip) is False
 
 
+def test_ipv4_mapped_classification():
+    for ip in ("::ffff:8.8.8.8", "::FFFF:177.139.233.139", "::ffff:808:808"):
+        assert util.is_private_ip(ip) is False
+        assert util.is_public_ip(ip)
+        assert util.is_loopback_ip(ip) is False
+        assert util.get_ip_info(ip)[1]
+
+    assert util.is_private_ip("::ffff:10.0.0.1")
+    assert util.is_public_ip("::ffff:10.0.0.1") is False
+    assert util.is_loopback_ip("::ffff:10.0.0.1") is False
+
+    assert util.is_private_ip("::ffff:127.0.0.1")
+    assert util.is_public_ip("::ffff:127.0.0.1") is False
+    assert util.is_loopback_ip("::ffff:127.0.0.1")
+
+
 def test_http_request_meta_headers(create_request):
     ip_str = "192.168.255.182, 10.0.0.0, 127.0.0.1, 198.84.193.157, 177.139.233.139,"
     request = create_request({"X-Forwarded-For": ip_str})
@@ -81,3 +101,134 @@ def test_get_ip_info():
     ip = "74dc::02ba"
     result = util.get_ip_info(ip)
     assert result == (ip, True)
+
+
+def test_ipv4_to_int():
+    assert util.ipv4_to_int("0.0.0.0") == 0
+    assert util.ipv4_to_int("255.255.255.255") == 2**32 - 1
+    assert util.ipv4_to_int("10.0.0.1") == 0x0A000001
+    assert util.ipv4_to_int("10.0.0.") is None
+    assert util.ipv4_to_int("::1") is None
+
+
+def test_is_private_ip_ranges():
+    assert util.is_public_ip("100.63.255.255")
+    assert util.is_private_ip("100.64.0.0")
+    assert util.is_private_ip("100.127.255.255")
+    assert util.is_public_ip("100.128.0.0")
+    assert util.is_private_ip("172.31.0.1")
+    assert util.is_public_ip("172.32.0.1")
+    assert util.is_private_ip("255.255.255.255")
+
+
+def test_ipv6_to_int():
+    assert util.ipv6_to_int("::") == 0
+    assert util.ipv6_to_int("::1") == 1
+    assert util.ipv6_to_int("FC00:0::1") == util.ipv6_to_int("fc00::1")
+    assert util.ipv6_to_int("10.0.0.1") is None
+
+
+def test_is_private_ipv6_spellings():
+    for ip in ("fc00::1", "FC00::1", "fc00:0::1", "fc00:0000:0:0::0001"):
+        assert util.is_private_ip(ip), ip
+    for ip in ("fd12:3456::1", "fe80::1", "FEBF::1", "2001:0:4136::1"):
+        assert util.is_private_ip(ip), ip
+    for ip in ("::2", "::a:b", "fec0::1", "2001:db9::1", "fe00::1"):
+        assert util.is_public_ip(ip), ip
+    assert util.is_private_ip("::")
+    assert util.is_loopback_ip("0:0::1")
+    assert util.is_loopback_ip("::2") is False
+
+
+def test_get_best_ip_parsed():
+    public, private, loopback = (
+        parse_ip(ip) for ip in ("177.139.233.139", "10.0.0.1", "127.0.0.1")
+    )
+    assert util.get_best_ip(None, private) is private
+    assert util.get_best_ip(public, private) is public
+    assert util.get_best_ip(private, loopback) is private
+    assert util.get_best_ip(loopback, private) is private
+    assert util.get_ip_info(loopback) == ("127.0.0.1", False)
+
+
+def test_scan_ips_from_string():
+    ip_str = "192.168.255.182, 198.84.193.157, 177.139.233.139 ,"
+    assert util.scan_ips_from_string(ip_str) == (
+        "192.168.255.182",
+        "177.139.233.139",
+        3,
+    )
+    assert util.scan_ips_from_string(" , 74DC::02BA,, ,") == (
+        "74dc::02ba",
+        "74dc::02ba",
+        1,
+    )
+    assert util.scan_ips_from_string("177.139.233.139") == (
+        "177.139.233.139",
+        "177.139.233.139",
+        1,
+    )
+    assert util.scan_ips_from_string(" ,, ") == (None, None, 0)
+
+
+def test_walk_ips_from_string():
+    trusted = NetworkIndex(["10.0.0.0/8", "2001:db8::/32"])
+    ip_str = "177.139.233.139, 198.84.193.157 ,10.0.0.2, 2001:DB8::1"
+    walk = util.walk_ips_from_string
+    assert walk(ip_str, trusted).ip == "198.84.193.157"
+    assert walk(ip_str, trusted, max_skip=1).ip == "10.0.0.2"
+    assert walk(ip_str, trusted, max_skip=0).ip == "2001:db8::1"
+    assert walk(ip_str).ip == "2001:db8::1"
+    assert walk("10.0.0.1,, 10.0.0.2, ", trusted).ip == "10.0.0.1"
+    assert walk("unknown, 10.0.0.2", trusted) is None
+    assert walk("unknown, 177.139.233.139, 10.0.0.2", trusted).ip == (
+        "177.139.233.139"
+    )
+    assert walk(ip_str, trusted, max_length=10) is None
+    assert walk(ip_str, trusted, max_count=3) is None
+    assert walk(" , ", trusted) is None
+
+
+def test_scan_ips_from_string_limits():
+    ip_str = ", ".join(["177.139.233.139"] * 10)
+    assert util.scan_ips_from_string(ip_str, max_count=10)[2] == 10
+    assert util.scan_ips_from_string(ip_str, max_count=9) == (None, None, 0)
+    assert util.scan_ips_from_string(ip_str, max_length=len(ip_str))[2] == 10
+    assert util.scan_ips_from_string(ip_str, max_length=20) == (None, None, 0)
+
+
+def test_ips_from_strings_normalized():
+    ip_str = "177.139.233.139:51234, [74dc::02ba]:443, fe80::1%eth0"
+    result = util.get_ips_from_string(ip_str)
+    assert result == (["177.139.233.139", "74dc::02ba", "fe80::1"], 3)
+
+
+def test_classify_ipv4_array():
+    np = pytest.importorskip("numpy")
+    addresses = [
+        "10.0.0.1",
+        "127.0.0.1",
+        "177.139.233.139",
+        "255.255.255.255",
+        "0.0.0.0",
+        "not an ip",
+    ]
+    private, loopback, public = util.classify_ipv4_array(addresses)
+    assert private.tolist() == [util.is_private_ip(ip) for ip in addresses]
+    assert loopback.tolist() == [util.is_loopback_ip(ip) for ip in addresses]
+    assert public.tolist() == [False, False, True, False, False, False]
+
+    values, valid = util.ipv4_array_to_int(np.array(addresses[:3]))
+    assert values.dtype == np.uint32
+    assert valid.all()
+    assert util.classify_ipv4_array(values)[0].tolist() == [
+        True,
+        True,
+        False,
+    ]
+
+    private, loopback, public = util.classify_ipv4_array(
+        np.array([-1, 4294967296, 134744072], dtype=np.int64)
+    )
+    assert private.tolist() == [False, False, False]
+    assert public.tolist() == [False, False, True]